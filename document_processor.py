@@ -4,28 +4,99 @@ Módulo responsável por extrair texto de diferentes formatos de arquivo
 """
 
 import os
+import re
+import mmap
 import sqlite3
 import hashlib
-from typing import List, Dict, Any
+import weakref
+import threading
+import multiprocessing
+from collections import Counter
+from typing import List, Dict, Any, Tuple
 from pathlib import Path
 import logging
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from text_extraction import (
+    extract_text_from_pdf, extract_text_from_docx, extract_text_from_txt,
+    extract_text, chunk_text, extract_and_chunk
+)
 
 # Imports para processamento de documentos
 try:
-    import PyPDF2
+    import chromadb
+    from chromadb.config import Settings
 except ImportError:
-    PyPDF2 = None
+    chromadb = None
 
 try:
-    from docx import Document
+    from sentence_transformers import SentenceTransformer
 except ImportError:
-    Document = None
+    SentenceTransformer = None
 
 try:
-    import chromadb
-    from chromadb.config import Settings
+    import xxhash
 except ImportError:
-    chromadb = None
+    xxhash = None
+
+try:
+    from blake3 import blake3
+except ImportError:
+    blake3 = None
+
+# Arquivos acima deste tamanho são mapeados em memória para o cálculo de hash
+HASH_MMAP_THRESHOLD = 1 << 20
+
+# Modelo de embeddings local (multilíngue, adequado a documentos em português)
+EMBEDDING_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+
+# Nome da coleção de chunks no ChromaDB
+COLLECTION_NAME = "document_chunks"
+
+# Parâmetros do índice HNSW: distância cosseno (embeddings normalizados) e
+# grafo mais enxuto (M=16) para reduzir memória por vetor
+HNSW_SETTINGS = {
+    "hnsw:space": "cosine",
+    "hnsw:construction_ef": 100,
+    "hnsw:M": 16
+}
+
+# Distância de Hamming máxima entre assinaturas para considerar chunks quase
+# idênticos (estes são salvos, mas não recebem embedding próprio no ChromaDB)
+NEAR_DUPLICATE_DISTANCE = 3
+
+# Palavras por shingle na assinatura SimHash: a ordem das palavras conta e cada
+# palavra trocada altera todos os shingles que a contêm
+SHINGLE_SIZE = 3
+
+_WORD_RE = re.compile(r"\w+")
+
+# Comandos SQL do caminho de ingestão, compartilhados entre as chamadas para
+# reaproveitar as instruções já compiladas no cache da conexão
+_SQL_DEDUP = "SELECT id FROM documents WHERE file_hash = ? AND hash_algo = ?"
+_SQL_INSERT_DOC = (
+    "INSERT INTO documents (filename, file_hash, file_type, chunk_count, hash_algo) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+_SQL_INSERT_CHUNK = "INSERT INTO chunks (document_id, chunk_index, content) VALUES (?, ?, ?)"
+_SQL_CHUNK_IDS = "SELECT id FROM chunks WHERE document_id = ? ORDER BY chunk_index"
+_SQL_INSERT_SIGNATURE = (
+    "INSERT INTO chunk_signatures "
+    "(chunk_id, content_hash, sig, band0, band1, band2, band3, embedded) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+_SQL_CHUNK_EXISTS = "SELECT 1 FROM chunk_signatures WHERE content_hash = ? LIMIT 1"
+_SQL_SIGNATURE_CANDIDATES = (
+    "SELECT sig FROM chunk_signatures "
+    "WHERE embedded = 1 AND (band0 = ? OR band1 = ? OR band2 = ? OR band3 = ?)"
+)
+_SQL_STAGE_CHUNK = "INSERT OR IGNORE INTO pending_chunks (chunk_id) VALUES (?)"
+
+# Intervalo (s) entre as verificações da fila de indexação em segundo plano
+INDEX_POLL_INTERVAL = 2.0
+
+# Acima deste número de chunks pendentes a ingestão aguarda a indexação
+MAX_PENDING_CHUNKS = 5000
 
 # Configuração de logging
 logging.basicConfig(level=logging.INFO)
@@ -42,6 +113,25 @@ class DocumentProcessor:
             db_path: Caminho para o banco de dados de conhecimento
         """
         self.db_path = db_path
+        # O hash serve só para detectar arquivos repetidos: prefere o mais rápido
+        if xxhash is not None:
+            self.hash_algo = "xxh3_128"
+        elif blake3 is not None:
+            self.hash_algo = "blake3"
+        else:
+            self.hash_algo = "sha256"
+        # Algoritmos antigos ainda presentes no banco (None: ainda não consultado)
+        self._legacy_algos = None
+        self.conn = None
+        # A conexão é compartilhada entre as threads da interface
+        self._db_lock = threading.RLock()
+        
+        # Serializa o envio de chunks pendentes ao ChromaDB
+        self._index_lock = threading.Lock()
+        self._index_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._indexer = None
+        
         self.setup_database()
         self.setup_vector_db()
     
@@ -50,8 +140,19 @@ class DocumentProcessor:
         os.makedirs(self.db_path, exist_ok=True)
         self.db_file = os.path.join(self.db_path, "documents.db")
         
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
+        # Conexão única mantida durante a vida do processador, com cache de
+        # instruções compiladas maior que o padrão (128)
+        self.conn = sqlite3.connect(self.db_file, check_same_thread=False,
+                                    cached_statements=256)
+        cursor = self.conn.cursor()
+        
+        # WAL reduz fsyncs por transação durante a ingestão; os demais ajustes
+        # mantêm tabelas temporárias e páginas lidas em memória
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA mmap_size=268435456")
+        cursor.execute("PRAGMA cache_size=-65536")
         
         # Tabela para metadados dos documentos
         cursor.execute('''
@@ -61,10 +162,16 @@ class DocumentProcessor:
                 file_hash TEXT UNIQUE NOT NULL,
                 file_type TEXT NOT NULL,
                 processed_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                chunk_count INTEGER DEFAULT 0
+                chunk_count INTEGER DEFAULT 0,
+                hash_algo TEXT NOT NULL DEFAULT 'md5'
             )
         ''')
         
+        # Migração: bancos antigos só possuíam hashes MD5
+        cursor.execute("PRAGMA table_info(documents)")
+        if "hash_algo" not in {row[1] for row in cursor.fetchall()}:
+            cursor.execute("ALTER TABLE documents ADD COLUMN hash_algo TEXT NOT NULL DEFAULT 'md5'")
+        
         # Tabela para chunks de texto
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS chunks (
@@ -76,16 +183,156 @@ class DocumentProcessor:
             )
         ''')
         
-        conn.commit()
-        conn.close()
+        # Impressões digitais dos chunks: hash do texto (chunks idênticos não são
+        # salvos de novo) e assinatura SimHash, dividida em 4 faixas de 16 bits
+        # para localizar quase-duplicatas (distância <= 3 => uma faixa igual)
+        cursor.execute("PRAGMA table_info(chunk_signatures)")
+        columns = {row[1] for row in cursor.fetchall()}
+        if columns and "content_hash" not in columns:
+            # Formato antigo (só a assinatura): recriada a partir dos chunks
+            cursor.execute("DROP TABLE chunk_signatures")
+            columns = set()
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS chunk_signatures (
+                chunk_id INTEGER PRIMARY KEY,
+                content_hash BLOB NOT NULL,
+                sig INTEGER NOT NULL,
+                band0 INTEGER,
+                band1 INTEGER,
+                band2 INTEGER,
+                band3 INTEGER,
+                embedded INTEGER NOT NULL DEFAULT 1
+            )
+        ''')
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_chunk_signatures_hash ON chunk_signatures(content_hash)"
+        )
+        for band in range(4):
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_chunk_signatures_band{band} "
+                f"ON chunk_signatures(band{band})"
+            )
+        
+        # Chunks já existentes (todos enviados ao ChromaDB) ganham suas assinaturas
+        if not columns:
+            cursor.execute("SELECT id, content FROM chunks")
+            cursor.executemany(_SQL_INSERT_SIGNATURE, [
+                (chunk_id, _content_hash(content), _to_signed64(sig), *_signature_bands(sig), 1)
+                for chunk_id, content in cursor.fetchall()
+                for sig in (_text_signature(content),)
+            ])
+        
+        # Chunks já salvos que ainda não foram enviados ao ChromaDB; a inserção
+        # no grafo HNSW fica para a thread de indexação em segundo plano
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS pending_chunks (
+                chunk_id INTEGER PRIMARY KEY
+            )
+        ''')
+        
+        # Índices para o JOIN chunks/documents e para as estatísticas por tipo
+        # (file_hash já é indexado pela restrição UNIQUE)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_chunks_document_id ON chunks(document_id)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_documents_file_type ON documents(file_type)")
+        
+        # Índice de texto completo para a busca por palavra-chave
+        self.fts_enabled = self._setup_fts(cursor)
+        
+        self.conn.commit()
+    
+    def close(self, flush: bool = True):
+        """
+        Encerra a indexação em segundo plano e fecha a conexão com o banco de dados
+        
+        Args:
+            flush: Envia ao ChromaDB os chunks ainda pendentes antes de fechar
+                   (sem isso eles ficam para a próxima execução)
+        """
+        if self.conn is None:
+            return
+        
+        if flush:
+            try:
+                self.flush_chroma()
+            except Exception as e:
+                logger.warning(f"Erro ao indexar chunks pendentes: {e}")
+        
+        self._stop_event.set()
+        self._index_event.set()
+        if self._indexer is not None and self._indexer is not threading.current_thread():
+            self._indexer.join(timeout=10)
+            self._indexer = None
+        
+        with self._db_lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+    
+    def __del__(self):
+        try:
+            self.close(flush=False)
+        except Exception:
+            pass
+    
+    def _setup_fts(self, cursor) -> bool:
+        """
+        Cria o índice FTS5 sobre os chunks, mantido por triggers
+        
+        Returns:
+            True se o FTS5 estiver disponível no SQLite
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'chunks_fts'")
+        exists = cursor.fetchone() is not None
+        
+        try:
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(
+                    content,
+                    content='chunks',
+                    content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2'
+                )
+            ''')
+        except sqlite3.OperationalError as e:
+            logger.warning(f"FTS5 indisponível, busca por palavra-chave usará LIKE: {e}")
+            return False
+        
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS chunks_ai AFTER INSERT ON chunks BEGIN
+                INSERT INTO chunks_fts(rowid, content) VALUES (new.id, new.content);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS chunks_ad AFTER DELETE ON chunks BEGIN
+                INSERT INTO chunks_fts(chunks_fts, rowid, content) VALUES ('delete', old.id, old.content);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS chunks_au AFTER UPDATE ON chunks BEGIN
+                INSERT INTO chunks_fts(chunks_fts, rowid, content) VALUES ('delete', old.id, old.content);
+                INSERT INTO chunks_fts(rowid, content) VALUES (new.id, new.content);
+            END
+        ''')
+        
+        # Bancos criados antes do índice precisam indexar os chunks existentes
+        if not exists:
+            cursor.execute("INSERT INTO chunks_fts(chunks_fts) VALUES ('rebuild')")
+        
+        return True
     
     def setup_vector_db(self):
         """Configura o banco de dados vetorial ChromaDB"""
+        self.collection = None
+        self.embedder = None
+        
         if chromadb is None:
             logger.warning("ChromaDB não instalado. Funcionalidade de busca semântica limitada.")
             self.chroma_client = None
             return
         
+        self.setup_embedder()
+        
         try:
             # Configuração para persistência local
             self.chroma_client = chromadb.PersistentClient(
@@ -93,105 +340,217 @@ class DocumentProcessor:
             )
             
             # Coleção para embeddings
-            self.collection = self.chroma_client.get_or_create_collection(
-                name="document_chunks",
-                metadata={"description": "Chunks de documentos para busca semântica"}
-            )
+            self.collection = self._create_collection()
+            
+            # Vetores de modelos diferentes não são comparáveis e o índice HNSW
+            # não pode ser reconfigurado: recria a coleção a partir dos chunks
+            # do SQLite quando o modelo ou os parâmetros do índice mudam
+            stored = self.collection.metadata or {}
+            expected = self._collection_metadata()
+            changed = [key for key in ("embedding_model", *HNSW_SETTINGS)
+                       if stored.get(key, "default" if key == "embedding_model" else None) != expected[key]]
+            if changed:
+                logger.info(f"Configuração da coleção alterada ({', '.join(changed)}), reindexando chunks...")
+                self.chroma_client.delete_collection(COLLECTION_NAME)
+                self.collection = self._create_collection()
+                self.reindex_vector_db()
         except Exception as e:
             logger.error(f"Erro ao configurar ChromaDB: {e}")
             self.chroma_client = None
+            return
+        
+        # A thread recebe só uma referência fraca: não impede que o processador
+        # seja coletado (e __del__ a encerre)
+        self._indexer = threading.Thread(
+            target=_index_in_background,
+            args=(weakref.ref(self), self._index_event, self._stop_event),
+            name="chroma-indexer",
+            daemon=True
+        )
+        self._indexer.start()
     
-    def calculate_file_hash(self, file_path: str) -> str:
-        """Calcula hash MD5 do arquivo"""
-        hash_md5 = hashlib.md5()
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_md5.update(chunk)
-        return hash_md5.hexdigest()
-    
-    def extract_text_from_pdf(self, file_path: str) -> str:
-        """Extrai texto de arquivo PDF"""
-        if PyPDF2 is None:
-            raise ImportError("PyPDF2 não está instalado. Execute: pip install PyPDF2")
+    def setup_embedder(self):
+        """Carrega o modelo local de embeddings (GPU se disponível)"""
+        self.embedding_model_name = "default"
+        if SentenceTransformer is None:
+            return
         
-        text = ""
         try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
+            import torch
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+            self.embedder = SentenceTransformer(EMBEDDING_MODEL, device=device)
+            self.embedding_model_name = EMBEDDING_MODEL
         except Exception as e:
-            logger.error(f"Erro ao extrair texto do PDF {file_path}: {e}")
-            raise
-        
-        return text.strip()
+            logger.warning(f"Erro ao carregar modelo de embeddings, usando o padrão do ChromaDB: {e}")
+            self.embedder = None
+    
+    def _collection_metadata(self) -> Dict[str, Any]:
+        """Metadados usados na criação da coleção de chunks"""
+        return {
+            "description": "Chunks de documentos para busca semântica",
+            "embedding_model": self.embedding_model_name,
+            **HNSW_SETTINGS
+        }
     
-    def extract_text_from_docx(self, file_path: str) -> str:
-        """Extrai texto de arquivo DOCX"""
-        if Document is None:
-            raise ImportError("python-docx não está instalado. Execute: pip install python-docx")
+    def _create_collection(self):
+        """Cria (ou abre) a coleção de chunks no ChromaDB"""
+        return self.chroma_client.get_or_create_collection(
+            name=COLLECTION_NAME,
+            metadata=self._collection_metadata()
+        )
+    
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """
+        Gera embeddings normalizados para uma lista de textos em lote
         
-        text = ""
-        try:
-            doc = Document(file_path)
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-        except Exception as e:
-            logger.error(f"Erro ao extrair texto do DOCX {file_path}: {e}")
-            raise
+        Args:
+            texts: Textos a serem convertidos
         
-        return text.strip()
+        Returns:
+            Lista de vetores de embeddings
+        """
+        embeddings = self.embedder.encode(
+            texts,
+            batch_size=64,
+            normalize_embeddings=True,
+            convert_to_numpy=True
+        )
+        return embeddings.tolist()
     
-    def extract_text_from_txt(self, file_path: str) -> str:
-        """Extrai texto de arquivo TXT"""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                return file.read().strip()
-        except UnicodeDecodeError:
-            # Tenta com encoding latin-1 se UTF-8 falhar
-            with open(file_path, 'r', encoding='latin-1') as file:
-                return file.read().strip()
-    
-    def chunk_text(self, text: str, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
+    def reindex_vector_db(self):
+        """Enfileira todos os chunks armazenados no SQLite para reenvio ao ChromaDB"""
+        with self._db_lock, self.conn:
+            # Quase-duplicatas continuam fora do ChromaDB
+            self.conn.execute('''
+                INSERT OR IGNORE INTO pending_chunks (chunk_id)
+                SELECT id FROM chunks
+                WHERE id NOT IN (SELECT chunk_id FROM chunk_signatures WHERE embedded = 0)
+            ''')
+        self._index_event.set()
+        
+    def calculate_file_hash(self, file_path: str, algo: str = None) -> str:
         """
-        Divide o texto em chunks menores para processamento
+        Calcula hash do arquivo
         
         Args:
-            text: Texto a ser dividido
-            chunk_size: Tamanho máximo de cada chunk
-            overlap: Sobreposição entre chunks
+            file_path: Caminho para o arquivo
+            algo: Algoritmo de hash (padrão: xxh3_128, BLAKE3 ou SHA-256, conforme instalado)
         
         Returns:
-            Lista de chunks de texto
+            Hash hexadecimal do arquivo
         """
-        if len(text) <= chunk_size:
-            return [text]
+        algo = algo or self.hash_algo
+        return self.calculate_file_hashes(file_path, [algo])[algo]
+    
+    def calculate_file_hashes(self, file_path: str, algos: List[str]) -> Dict[str, str]:
+        """
+        Calcula o hash do arquivo em vários algoritmos com uma única leitura
+        
+        Args:
+            file_path: Caminho para o arquivo
+            algos: Algoritmos de hash
         
-        chunks = []
-        start = 0
+        Returns:
+            Dicionário algoritmo -> hash hexadecimal
+        """
+        hashers = {}
+        for algo in algos:
+            if algo == "xxh3_128":
+                hashers[algo] = xxhash.xxh3_128()
+            elif algo == "blake3":
+                hashers[algo] = blake3(max_threads=blake3.AUTO)
+            else:
+                hashers[algo] = hashlib.new(algo)
         
-        while start < len(text):
-            end = start + chunk_size
+        # Sem buffer do Python: as leituras já são feitas em blocos grandes
+        with open(file_path, "rb", buffering=0) as f:
+            size = os.fstat(f.fileno()).st_size
+            if size <= HASH_MMAP_THRESHOLD:
+                data = f.read()
+                for hasher in hashers.values():
+                    hasher.update(data)
+                return {algo: hasher.hexdigest() for algo, hasher in hashers.items()}
             
-            # Tenta quebrar em uma frase completa
-            if end < len(text):
-                # Procura pelo último ponto, exclamação ou interrogação
-                last_sentence = max(
-                    text.rfind('.', start, end),
-                    text.rfind('!', start, end),
-                    text.rfind('?', start, end)
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                # Sistemas de arquivos sem suporte a mmap: lê em blocos num único
+                # buffer reaproveitado, sem alocar um bytes novo por bloco
+                buffer = bytearray(HASH_MMAP_THRESHOLD)
+                view = memoryview(buffer)
+                while True:
+                    n = f.readinto(buffer)
+                    if not n:
+                        break
+                    for hasher in hashers.values():
+                        hasher.update(view[:n])
+            else:
+                # Entrega as páginas do arquivo direto ao hash, sem cópias por bloco
+                with mm:
+                    if hasattr(mmap, "MADV_SEQUENTIAL"):
+                        mm.madvise(mmap.MADV_SEQUENTIAL)
+                    for hasher in hashers.values():
+                        hasher.update(mm)
+        return {algo: hasher.hexdigest() for algo, hasher in hashers.items()}
+    
+    def find_existing_document(self, cursor, file_path: str, file_hash: str):
+        """
+        Procura um documento já processado com o mesmo conteúdo
+        
+        Documentos registrados com outro algoritmo de hash (ex.: MD5 de versões
+        antigas) são comparados recalculando o hash nesse algoritmo e, se
+        encontrados, têm o hash atualizado para o algoritmo atual.
+        
+        Args:
+            cursor: Cursor SQLite aberto
+            file_path: Caminho para o arquivo
+            file_hash: Hash do arquivo no algoritmo atual
+        
+        Returns:
+            Linha (id,) do documento existente ou None
+        """
+        cursor.execute(_SQL_DEDUP, (file_hash, self.hash_algo))
+        existing = cursor.fetchone()
+        if existing:
+            return existing
+        
+        # Sem documentos antigos no banco o arquivo não precisa ser relido
+        if self._legacy_algos is None:
+            cursor.execute(
+                "SELECT DISTINCT hash_algo FROM documents WHERE hash_algo != ?",
+                (self.hash_algo,)
+            )
+            self._legacy_algos = [
+                algo for (algo,) in cursor.fetchall()
+                if not ((algo == "blake3" and blake3 is None) or (algo == "xxh3_128" and xxhash is None))
+            ]
+        if not self._legacy_algos:
+            return None
+        
+        # Todos os algoritmos antigos com uma única leitura do arquivo
+        legacy_hashes = self.calculate_file_hashes(file_path, self._legacy_algos)
+        for algo, legacy_hash in legacy_hashes.items():
+            cursor.execute(_SQL_DEDUP, (legacy_hash, algo))
+            existing = cursor.fetchone()
+            if existing:
+                cursor.execute(
+                    "UPDATE documents SET file_hash = ?, hash_algo = ? WHERE id = ?",
+                    (file_hash, self.hash_algo, existing[0])
                 )
-                
-                if last_sentence > start:
-                    end = last_sentence + 1
-            
-            chunk = text[start:end].strip()
-            if chunk:
-                chunks.append(chunk)
-            
-            start = end - overlap
+                cursor.connection.commit()
+                # Pode ter sido o último documento com esse algoritmo
+                self._legacy_algos = None
+                return existing
         
-        return chunks
+        return None
+    
+    # A leitura dos arquivos fica em text_extraction, que os processos de
+    # process_documents importam sem as dependências da busca
+    extract_text_from_pdf = staticmethod(extract_text_from_pdf)
+    extract_text_from_docx = staticmethod(extract_text_from_docx)
+    extract_text_from_txt = staticmethod(extract_text_from_txt)
+    extract_text = staticmethod(extract_text)
+    chunk_text = staticmethod(chunk_text)
     
     def process_document(self, file_path: str, progress_callback=None) -> bool:
         """
@@ -205,102 +564,335 @@ class DocumentProcessor:
             True se processado com sucesso, False caso contrário
         """
         try:
-            # Verifica se arquivo existe
-            if not os.path.exists(file_path):
-                logger.error(f"Arquivo não encontrado: {file_path}")
-                return False
+            return self.process_documents([file_path], progress_callback, max_workers=1)[file_path]
+        except Exception as e:
+            logger.error(f"Erro ao processar documento {file_path}: {e}")
+            return False
+    
+    def process_documents(self, file_paths: List[str], progress_callback=None,
+                          batch_size: int = 250, max_workers: int = None) -> Dict[str, bool]:
+        """
+        Processa vários documentos e enfileira os chunks para o ChromaDB
+        
+        A extração de texto e a divisão em chunks rodam em paralelo em processos
+        separados; apenas o processo principal grava no SQLite. O envio ao
+        ChromaDB é feito em segundo plano (flush_chroma aguarda o término).
+        
+        Os processos são iniciados com "spawn" (e não com fork, que copiaria as
+        threads em execução) e importam apenas o módulo text_extraction.
+        
+        Args:
+            file_paths: Caminhos para os arquivos
+            progress_callback: Função de callback para progresso
+            batch_size: Quantidade de chunks por chamada a collection.add
+            max_workers: Processos de extração (padrão: número de CPUs; 1 desativa)
+        
+        Returns:
+            Dicionário com o resultado do processamento de cada arquivo
+        """
+        results = {}
+        cursor = self.conn.cursor()
+        
+        try:
+            # Filtra arquivos inexistentes ou já processados antes de extrair
+            to_process = []
+            seen_hashes = set()
+            for file_path in file_paths:
+                filename = os.path.basename(file_path)
+                try:
+                    if not os.path.exists(file_path):
+                        logger.error(f"Arquivo não encontrado: {file_path}")
+                        results[file_path] = False
+                        continue
+                    
+                    file_hash = self.calculate_file_hash(file_path)
+                    if file_hash in seen_hashes:
+                        existing = True
+                    else:
+                        with self._db_lock:
+                            existing = self.find_existing_document(cursor, file_path, file_hash)
+                    
+                    if existing:
+                        logger.info(f"Documento {filename} já foi processado anteriormente")
+                        results[file_path] = True
+                        continue
+                    
+                    seen_hashes.add(file_hash)
+                    to_process.append((file_path, file_hash))
+                except Exception as e:
+                    logger.error(f"Erro ao processar documento {file_path}: {e}")
+                    results[file_path] = False
             
-            # Calcula hash do arquivo
-            file_hash = self.calculate_file_hash(file_path)
-            filename = os.path.basename(file_path)
-            file_ext = Path(file_path).suffix.lower()
+            executor = None
+            if len(to_process) > 1 and max_workers != 1:
+                if progress_callback:
+                    progress_callback("Extraindo texto dos documentos...")
+                executor = ProcessPoolExecutor(max_workers=max_workers,
+                                               mp_context=multiprocessing.get_context("spawn"))
+                futures = [executor.submit(extract_and_chunk, file_path)
+                           for file_path, _ in to_process]
             
-            # Verifica se já foi processado
-            conn = sqlite3.connect(self.db_file)
-            cursor = conn.cursor()
-            cursor.execute("SELECT id FROM documents WHERE file_hash = ?", (file_hash,))
-            existing = cursor.fetchone()
+            try:
+                for i, (file_path, file_hash) in enumerate(to_process):
+                    try:
+                        if executor:
+                            chunks = futures[i].result()
+                        else:
+                            chunks = extract_and_chunk(file_path, progress_callback)
+                        
+                        results[file_path] = self._store_document(
+                            file_path, file_hash, chunks, progress_callback
+                        )
+                    except Exception as e:
+                        logger.error(f"Erro ao processar documento {file_path}: {e}")
+                        results[file_path] = False
+                    
+                    # Contrapressão: se a indexação ficou para trás, envia
+                    # os lotes completos antes de seguir
+                    if self.pending_count() >= MAX_PENDING_CHUNKS:
+                        self.flush_chroma(batch_size, keep_partial=True)
+            finally:
+                if executor:
+                    executor.shutdown()
+        finally:
+            cursor.close()
+        
+        # O restante é indexado pela thread em segundo plano
+        self._index_event.set()
+        return results
+    
+    def _store_document(self, file_path: str, file_hash: str, chunks: List[str],
+                        progress_callback=None) -> bool:
+        """
+        Salva documento e chunks no SQLite e enfileira os chunks para o ChromaDB
+        
+        Args:
+            file_path: Caminho para o arquivo
+            file_hash: Hash do arquivo
+            chunks: Chunks de texto extraídos do arquivo
+            progress_callback: Função de callback para progresso
+        
+        Returns:
+            True se salvo com sucesso, False se não havia texto
+        """
+        filename = os.path.basename(file_path)
+        file_ext = Path(file_path).suffix.lower()
+        
+        if not chunks:
+            logger.warning(f"Nenhum texto extraído do arquivo: {filename}")
+            return False
+        
+        # Salva documento e chunks em uma única transação
+        with self._db_lock, self.conn:
+            cursor = self.conn.cursor()
             
-            if existing:
+            # Arquivos iguais processados ao mesmo tempo (ex.: por threads da
+            # interface) passam juntos pela verificação inicial; só o primeiro é salvo
+            cursor.execute(_SQL_DEDUP, (file_hash, self.hash_algo))
+            if cursor.fetchone():
                 logger.info(f"Documento {filename} já foi processado anteriormente")
-                conn.close()
                 return True
             
-            if progress_callback:
-                progress_callback("Extraindo texto do documento...")
+            total_chunks = len(chunks)
+            entries = self._filter_duplicate_chunks(cursor, chunks)
+            chunks = [entry[1] for entry in entries]
+            if len(chunks) < total_chunks:
+                logger.info(f"{total_chunks - len(chunks)} chunks repetidos ignorados em {filename}")
             
-            # Extrai texto baseado na extensão
-            if file_ext == '.pdf':
-                text = self.extract_text_from_pdf(file_path)
-            elif file_ext == '.docx':
-                text = self.extract_text_from_docx(file_path)
-            elif file_ext == '.txt':
-                text = self.extract_text_from_txt(file_path)
-            else:
-                logger.error(f"Formato de arquivo não suportado: {file_ext}")
-                conn.close()
-                return False
+            cursor.execute(_SQL_INSERT_DOC,
+                           (filename, file_hash, file_ext, len(chunks), self.hash_algo))
             
-            if not text.strip():
-                logger.warning(f"Nenhum texto extraído do arquivo: {filename}")
-                conn.close()
-                return False
+            document_id = cursor.lastrowid
             
-            if progress_callback:
-                progress_callback("Dividindo texto em chunks...")
+            # Cada chunk mantém a posição original no documento, mesmo com repetidos removidos
+            rows = [(document_id, index, chunk) for index, chunk, *_ in entries]
+            cursor.executemany(_SQL_INSERT_CHUNK, rows)
             
-            # Divide em chunks
-            chunks = self.chunk_text(text)
+            cursor.execute(_SQL_CHUNK_IDS, (document_id,))
+            chunk_ids = [row[0] for row in cursor.fetchall()]
+            cursor.executemany(_SQL_INSERT_SIGNATURE, [
+                (chunk_id, content_hash, _to_signed64(sig), *_signature_bands(sig), int(embed))
+                for chunk_id, (_, _, content_hash, sig, embed) in zip(chunk_ids, entries)
+            ])
             
-            # Salva no banco de dados
-            cursor.execute('''
-                INSERT INTO documents (filename, file_hash, file_type, chunk_count)
-                VALUES (?, ?, ?, ?)
-            ''', (filename, file_hash, file_ext, len(chunks)))
+            # Enfileira para o banco vetorial se disponível
+            if self.chroma_client and self.collection:
+                if progress_callback:
+                    progress_callback("Criando embeddings para busca...")
+                self._stage_chunks(cursor, [
+                    chunk_id for chunk_id, entry in zip(chunk_ids, entries) if entry[4]
+                ])
+        
+        logger.info(f"Documento {filename} processado com sucesso ({len(chunks)} chunks)")
+        return True
+    
+    def _filter_duplicate_chunks(self, cursor, chunks: List[str]) -> List[Tuple[int, str, bytes, int, bool]]:
+        """
+        Remove chunks idênticos a chunks já armazenados e marca os quase idênticos
+        
+        Chunks quase idênticos (ex.: de uma versão revisada do documento) são
+        mantidos no SQLite e na busca por palavra-chave, para que os trechos
+        alterados continuem pesquisáveis; só não recebem embedding no ChromaDB.
+        
+        Args:
+            cursor: Cursor SQLite aberto
+            chunks: Chunks do documento
+        
+        Returns:
+            Lista de (posição no documento, chunk, hash do texto, assinatura SimHash,
+            se vai para o ChromaDB)
+        """
+        entries = []
+        local_hashes = set()
+        local_bands: Dict[Tuple[int, int], List[int]] = {}
+        
+        for index, chunk in enumerate(chunks):
+            # Texto idêntico ao de outro chunk: descartado
+            content_hash = _content_hash(chunk)
+            if content_hash in local_hashes:
+                continue
+            cursor.execute(_SQL_CHUNK_EXISTS, (content_hash,))
+            if cursor.fetchone():
+                continue
+            local_hashes.add(content_hash)
             
-            document_id = cursor.lastrowid
+            sig = _text_signature(chunk)
+            bands = _signature_bands(sig)
             
-            # Salva chunks
-            for i, chunk in enumerate(chunks):
-                cursor.execute('''
-                    INSERT INTO chunks (document_id, chunk_index, content)
-                    VALUES (?, ?, ?)
-                ''', (document_id, i, chunk))
+            # Candidatos do próprio documento
+            candidates = [
+                other
+                for band in enumerate(bands)
+                for other in local_bands.get(band, ())
+            ]
             
-            conn.commit()
+            # Candidatos da base de conhecimento
+            cursor.execute(_SQL_SIGNATURE_CANDIDATES, bands)
+            candidates.extend(row[0] & 0xFFFFFFFFFFFFFFFF for row in cursor.fetchall())
             
-            if progress_callback:
-                progress_callback("Criando embeddings para busca...")
+            # Só chunks com embedding servem de referência para os próximos
+            embed = not any(bin(sig ^ other).count("1") <= NEAR_DUPLICATE_DISTANCE
+                            for other in candidates)
+            if embed:
+                for band in enumerate(bands):
+                    local_bands.setdefault(band, []).append(sig)
             
-            # Adiciona ao banco vetorial se disponível
-            if self.chroma_client and self.collection:
-                try:
-                    chunk_ids = [f"{document_id}_{i}" for i in range(len(chunks))]
-                    metadatas = [
-                        {
-                            "document_id": document_id,
-                            "filename": filename,
-                            "chunk_index": i
-                        }
-                        for i in range(len(chunks))
-                    ]
-                    
-                    self.collection.add(
-                        documents=chunks,
-                        metadatas=metadatas,
-                        ids=chunk_ids
+            entries.append((index, chunk, content_hash, sig, embed))
+        
+        return entries
+    
+    def _stage_chunks(self, cursor, chunk_ids: List[int]):
+        """Enfileira chunks na tabela pending_chunks para inserção no ChromaDB"""
+        cursor.executemany(_SQL_STAGE_CHUNK, [(chunk_id,) for chunk_id in chunk_ids])
+    
+    def pending_count(self) -> int:
+        """Retorna quantos chunks ainda aguardam indexação no ChromaDB"""
+        with self._db_lock:
+            return self.conn.execute("SELECT COUNT(*) FROM pending_chunks").fetchone()[0]
+    
+    def flush_chroma(self, batch_size: int = 250, keep_partial: bool = False,
+                     max_workers: int = 4) -> bool:
+        """
+        Envia ao ChromaDB os chunks pendentes em lotes, aguardando o término
+        
+        Args:
+            batch_size: Quantidade de chunks por chamada a collection.add
+            keep_partial: Mantém pendente o último lote incompleto
+            max_workers: Chamadas a collection.add executadas em paralelo
+        
+        Returns:
+            True se todos os lotes foram aceitos pelo ChromaDB
+        """
+        if not (self.chroma_client and self.collection):
+            return True
+        
+        with self._index_lock:
+            while not self._stop_event.is_set():
+                with self._db_lock:
+                    cursor = self.conn.cursor()
+                    cursor.execute('''
+                        SELECT p.chunk_id, c.document_id, d.filename, c.chunk_index, c.content
+                        FROM pending_chunks p
+                        JOIN chunks c ON c.id = p.chunk_id
+                        JOIN documents d ON c.document_id = d.id
+                        ORDER BY p.chunk_id
+                        LIMIT ?
+                    ''', (batch_size * max(max_workers, 1),))
+                    rows = cursor.fetchall()
+                
+                if keep_partial:
+                    del rows[len(rows) - len(rows) % batch_size:]
+                if not rows:
+                    return True
+                
+                # Só sai da fila o que o ChromaDB aceitou
+                indexed = self._index_rows(rows, batch_size, max_workers)
+                with self._db_lock, self.conn:
+                    self.conn.executemany(
+                        "DELETE FROM pending_chunks WHERE chunk_id = ?",
+                        [(chunk_id,) for chunk_id in indexed]
                     )
-                except Exception as e:
-                    logger.warning(f"Erro ao adicionar embeddings: {e}")
-            
-            conn.close()
-            logger.info(f"Documento {filename} processado com sucesso ({len(chunks)} chunks)")
+                if len(indexed) < len(rows):
+                    return False
+        
+        return True
+    
+    def _index_rows(self, rows: List[tuple], batch_size: int, max_workers: int) -> List[int]:
+        """
+        Insere no ChromaDB linhas (chunk_id, document_id, filename, chunk_index, content)
+        
+        Returns:
+            Ids dos chunks inseridos com sucesso
+        """
+        docs = [row[4] for row in rows]
+        
+        # Embeddings calculados fora do ChromaDB, de uma vez, quando há modelo local
+        embeddings = None
+        if self.embedder is not None:
+            try:
+                embeddings = self.embed(docs)
+            except Exception as e:
+                logger.warning(f"Erro ao adicionar embeddings: {e}")
+                return []
+        
+        batches = []
+        for start in range(0, len(rows), batch_size):
+            end = start + batch_size
+            batch = {
+                "documents": docs[start:end],
+                "metadatas": [
+                    {"document_id": document_id, "filename": filename, "chunk_index": chunk_index}
+                    for _, document_id, filename, chunk_index, _ in rows[start:end]
+                ],
+                "ids": [f"{row[1]}_{row[3]}" for row in rows[start:end]]
+            }
+            if embeddings is not None:
+                batch["embeddings"] = embeddings[start:end]
+            batches.append(batch)
+        
+        # Com os embeddings prontos, cada add é só a inserção no HNSW/SQLite do
+        # ChromaDB, que libera o GIL e pode ser sobreposta entre lotes
+        if len(batches) > 1 and max_workers > 1:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(batches))) as executor:
+                added = list(executor.map(self._add_batch, batches))
+        else:
+            added = [self._add_batch(batch) for batch in batches]
+        
+        return [
+            row[0]
+            for i, ok in enumerate(added) if ok
+            for row in rows[i * batch_size:(i + 1) * batch_size]
+        ]
+    
+    def _add_batch(self, batch: Dict[str, Any]) -> bool:
+        """Insere um lote de chunks na coleção do ChromaDB"""
+        try:
+            self.collection.add(**batch)
             return True
-            
         except Exception as e:
-            logger.error(f"Erro ao processar documento {file_path}: {e}")
+            logger.warning(f"Erro ao adicionar embeddings: {e}")
             return False
-    
+            
     def search_knowledge(self, query: str, max_results: int = 5) -> List[Dict[str, Any]]:
         """
         Busca conhecimento relevante baseado na query
@@ -312,76 +904,122 @@ class DocumentProcessor:
         Returns:
             Lista de chunks relevantes com metadados
         """
-        results = []
+        return self.search_knowledge_many([query], max_results)[0]
+    
+    def search_knowledge_many(self, queries: List[str],
+                              max_results: int = 5) -> List[List[Dict[str, Any]]]:
+        """
+        Busca conhecimento relevante para várias queries de uma vez
+        
+        Os embeddings das queries são calculados em um único lote e enviados ao
+        ChromaDB em uma só consulta.
+        
+        Args:
+            queries: Textos das consultas
+            max_results: Número máximo de resultados por consulta
+        
+        Returns:
+            Lista com os chunks relevantes de cada consulta, na mesma ordem
+        """
+        all_results = [[] for _ in queries]
+        if not queries:
+            return all_results
         
         # Busca semântica com ChromaDB se disponível
         if self.chroma_client and self.collection:
             try:
-                search_results = self.collection.query(
-                    query_texts=[query],
-                    n_results=max_results
-                )
+                if self.embedder is not None:
+                    search_results = self.collection.query(
+                        query_embeddings=self.embed(list(queries)),
+                        n_results=max_results
+                    )
+                else:
+                    search_results = self.collection.query(
+                        query_texts=list(queries),
+                        n_results=max_results
+                    )
                 
-                if search_results['documents'] and search_results['documents'][0]:
-                    for i, doc in enumerate(search_results['documents'][0]):
-                        metadata = search_results['metadatas'][0][i]
-                        distance = search_results['distances'][0][i] if 'distances' in search_results else 0
+                distances = search_results['distances'] if 'distances' in search_results else None
+                for q, docs in enumerate(search_results['documents'] or []):
+                    for i, doc in enumerate(docs or []):
+                        metadata = search_results['metadatas'][q][i]
+                        distance = distances[q][i] if distances else 0
                         
-                        results.append({
+                        all_results[q].append({
                             'content': doc,
                             'filename': metadata.get('filename', 'Unknown'),
                             'chunk_index': metadata.get('chunk_index', 0),
-                            'relevance_score': 1 - distance  # Converte distância em score
+                            'relevance_score': 1 - distance  # Distância cosseno -> similaridade
                         })
                 
-                return results
-                
             except Exception as e:
                 logger.warning(f"Erro na busca semântica: {e}")
         
-        # Busca por palavra-chave como fallback
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
+        # Busca por palavra-chave como fallback, para as queries sem resultado
+        # semântico (ex.: coleção ainda sem os chunks, indexação pendente)
+        for query, results in zip(queries, all_results):
+            if results:
+                continue
+            
+            query_words = query.lower().split()
+            if not query_words:
+                continue
+            
+            with self._db_lock:
+                rows = self._keyword_search(query_words, max_results)
+            
+            for row in rows:
+                results.append({
+                    'content': row[0],
+                    'filename': row[1],
+                    'chunk_index': row[2],
+                    'relevance_score': 0.5  # Score padrão para busca por palavra-chave
+                })
         
-        # Busca simples por palavras-chave
-        query_words = query.lower().split()
-        search_pattern = '%' + '%'.join(query_words) + '%'
+        return all_results
+    
+    def _keyword_search(self, query_words: List[str], max_results: int) -> List[tuple]:
+        """Busca chunks que contenham as palavras, retornando (conteúdo, arquivo, índice)"""
+        cursor = self.conn.cursor()
+        if self.fts_enabled:
+            # Busca no índice FTS5 ordenada por BM25 (todas as palavras devem ocorrer)
+            fts_query = " ".join('"' + word.replace('"', '""') + '"' for word in query_words)
+            cursor.execute('''
+                SELECT c.content, d.filename, c.chunk_index
+                FROM chunks_fts
+                JOIN chunks c ON c.id = chunks_fts.rowid
+                JOIN documents d ON c.document_id = d.id
+                WHERE chunks_fts MATCH ?
+                ORDER BY bm25(chunks_fts)
+                LIMIT ?
+            ''', (fts_query, max_results))
+        else:
+            # Busca simples por palavras-chave
+            search_pattern = '%' + '%'.join(query_words) + '%'
+            cursor.execute('''
+                SELECT c.content, d.filename, c.chunk_index
+                FROM chunks c
+                JOIN documents d ON c.document_id = d.id
+                WHERE LOWER(c.content) LIKE ?
+                ORDER BY c.id
+                LIMIT ?
+            ''', (search_pattern, max_results))
         
-        cursor.execute('''
-            SELECT c.content, d.filename, c.chunk_index
-            FROM chunks c
-            JOIN documents d ON c.document_id = d.id
-            WHERE LOWER(c.content) LIKE ?
-            ORDER BY c.id
-            LIMIT ?
-        ''', (search_pattern, max_results))
-        
-        for row in cursor.fetchall():
-            results.append({
-                'content': row[0],
-                'filename': row[1],
-                'chunk_index': row[2],
-                'relevance_score': 0.5  # Score padrão para busca por palavra-chave
-            })
-        
-        conn.close()
-        return results
+        return cursor.fetchall()
     
     def get_document_stats(self) -> Dict[str, Any]:
         """Retorna estatísticas do banco de conhecimento"""
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT COUNT(*) FROM documents")
-        doc_count = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM chunks")
-        chunk_count = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT file_type, COUNT(*) FROM documents GROUP BY file_type")
-        file_types = dict(cursor.fetchall())
-        
-        conn.close()
+        with self._db_lock:
+            cursor = self.conn.cursor()
+            
+            cursor.execute("SELECT COUNT(*) FROM documents")
+            doc_count = cursor.fetchone()[0]
+            
+            cursor.execute("SELECT COUNT(*) FROM chunks")
+            chunk_count = cursor.fetchone()[0]
+            
+            cursor.execute("SELECT file_type, COUNT(*) FROM documents GROUP BY file_type")
+            file_types = dict(cursor.fetchall())
         
         return {
             'total_documents': doc_count,
@@ -392,27 +1030,105 @@ class DocumentProcessor:
     def clear_knowledge_base(self):
         """Limpa toda a base de conhecimento"""
         # Limpa banco SQLite
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM chunks")
-        cursor.execute("DELETE FROM documents")
-        conn.commit()
-        conn.close()
-        
-        # Limpa banco vetorial
+        with self._db_lock, self.conn:
+            cursor = self.conn.cursor()
+            cursor.execute("DELETE FROM pending_chunks")
+            cursor.execute("DELETE FROM chunk_signatures")
+            cursor.execute("DELETE FROM chunks")
+            cursor.execute("DELETE FROM documents")
+            self._legacy_algos = []
+        
+        # Limpa banco vetorial (sem lotes em andamento na thread de indexação)
         if self.chroma_client and self.collection:
-            try:
-                self.chroma_client.delete_collection("document_chunks")
-                self.collection = self.chroma_client.get_or_create_collection(
-                    name="document_chunks",
-                    metadata={"description": "Chunks de documentos para busca semântica"}
-                )
-            except Exception as e:
-                logger.warning(f"Erro ao limpar banco vetorial: {e}")
+            with self._index_lock:
+                try:
+                    self.chroma_client.delete_collection(COLLECTION_NAME)
+                    self.collection = self._create_collection()
+                except Exception as e:
+                    logger.warning(f"Erro ao limpar banco vetorial: {e}")
         
         logger.info("Base de conhecimento limpa com sucesso")
 
 
+def _index_in_background(processor_ref, index_event: threading.Event,
+                         stop_event: threading.Event):
+    """
+    Indexa os chunks pendentes em segundo plano (executado em thread própria)
+    
+    Args:
+        processor_ref: Referência fraca ao DocumentProcessor
+        index_event: Sinaliza que há chunks novos para indexar
+        stop_event: Sinaliza o encerramento da thread
+    """
+    delay = INDEX_POLL_INTERVAL
+    while not stop_event.is_set():
+        index_event.wait(delay)
+        index_event.clear()
+        
+        processor = processor_ref()
+        if processor is None or stop_event.is_set():
+            break
+        
+        try:
+            ok = processor.flush_chroma()
+        except Exception as e:
+            logger.warning(f"Erro na indexação em segundo plano: {e}")
+            ok = False
+        
+        # Sem referência forte durante a espera
+        processor = None
+        
+        # Falhas repetidas (ex.: ChromaDB indisponível) espaçam as tentativas
+        delay = INDEX_POLL_INTERVAL if ok else min(delay * 2, 60.0)
+
+
+def _content_hash(text: str) -> bytes:
+    """Hash do texto completo de um chunk, usado para descartar chunks idênticos"""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def _text_signature(text: str) -> int:
+    """
+    Calcula a assinatura SimHash de 64 bits dos shingles de palavras do texto
+    
+    Textos que compartilham quase todas as sequências de SHINGLE_SIZE palavras
+    geram assinaturas com poucos bits diferentes, o que permite detectar
+    chunks quase idênticos.
+    """
+    words = _WORD_RE.findall(text.lower())
+    shingles = Counter(
+        " ".join(words[i:i + SHINGLE_SIZE])
+        for i in range(max(len(words) - SHINGLE_SIZE + 1, 1))
+    )
+    threshold = sum(shingles.values())
+    weights = [0] * 64
+    
+    for shingle, count in shingles.items():
+        shingle_hash = int.from_bytes(
+            hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little"
+        )
+        for bit in range(64):
+            if shingle_hash >> bit & 1:
+                weights[bit] += count
+    
+    # Bit ligado quando a maioria (ponderada) dos shingles o possui
+    signature = 0
+    for bit, weight in enumerate(weights):
+        if 2 * weight > threshold:
+            signature |= 1 << bit
+    return signature
+
+
+def _signature_bands(signature: int) -> Tuple[int, int, int, int]:
+    """Divide a assinatura em 4 faixas de 16 bits"""
+    return tuple((signature >> shift) & 0xFFFF for shift in (0, 16, 32, 48))
+
+
+def _to_signed64(value: int) -> int:
+    """Converte um inteiro de 64 bits sem sinal para o formato aceito pelo SQLite"""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
 # Função utilitária para instalar dependências
 def install_dependencies():
     """Instala as dependências necessárias"""
@@ -421,8 +1137,12 @@ def install_dependencies():
     
     packages = [
         "PyPDF2",
+        "pypdfium2",
         "python-docx", 
         "chromadb",
+        "sentence-transformers",
+        "xxhash",
+        "blake3",
         "ollama"
     ]
     
@@ -7,71 +7,282 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 import threading
 import queue
+import time
 import os
-from typing import List, Optional
-import webbrowser
-from llm_system import LocalLLM, LLMTrainer
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional
+
+# Intervalo (ms) com que o thread do Tk aplica as atualizações das threads de trabalho
+STATUS_POLL_MS = 50
+
+# Limite de linhas mantidas no chat e no status (as mais antigas são descartadas)
+CHAT_MAX_LINES = 2000
+STATUS_MAX_LINES = 500
+
+# Documentos processados ao mesmo tempo ao adicionar vários arquivos (a leitura
+# de PDFs pelo PDFium, que não é thread-safe, continua sendo um arquivo por vez)
+INGEST_WORKERS = 4
+
+# Textos das janelas "Como usar" e "Sobre"
+_HELP_TEXT = """🤖 Como usar o Sistema LLM Local:
+
+1. 📁 Adicionar Documentos:
+   • Clique em "Adicionar Documentos"
+   • Selecione arquivos PDF, DOCX ou TXT
+   • Aguarde o processamento (aparecerá "Obrigado! Já aprendi tudo!")
+
+2. 💬 Conversar:
+   • Digite sua pergunta na caixa de texto
+   • Clique "Enviar" ou use Ctrl+Enter
+   • A IA responderá baseada nos documentos
+
+3. 🔧 Gerenciar:
+   • "Ver Estatísticas": mostra quantos documentos foram processados
+   • "Recomeçar do Zero": apaga toda a base de conhecimento
+   • "Limpar Chat": limpa apenas o histórico da conversa
+
+4. 💡 Dicas:
+   • Faça perguntas específicas sobre o conteúdo dos documentos
+   • A IA citará a fonte quando possível
+   • Use "Copiar Última Resposta" para copiar respostas longas"""
+
+_ABOUT_TEXT = """🤖 Sistema LLM Local v1.0
+
+Desenvolvido com:
+• Python + Tkinter (Interface)
+• Ollama + Llama 3.1 (IA)
+• ChromaDB (Busca semântica)
+• PyPDF2, python-docx (Processamento)
+
+Características:
+✅ 100% Local e Offline
+✅ Gratuito e Open Source  
+✅ Suporte ao Português
+✅ Persistência de dados
+✅ Interface amigável
+
+Criado para aprender com seus documentos
+e responder perguntas de forma inteligente!"""
+
+
+def _trim_lines(widget: tk.Text, max_lines: int):
+    """Remove as linhas mais antigas de um widget de texto acima do limite"""
+    lines = int(widget.index("end-1c").split(".")[0])
+    if lines > max_lines:
+        widget.delete("1.0", f"{lines - max_lines + 1}.0")
+
+
+def _drain_queue(pending: queue.Queue) -> list:
+    """Retira sem bloquear todos os itens disponíveis na fila"""
+    items = []
+    while True:
+        try:
+            items.append(pending.get_nowait())
+        except queue.Empty:
+            return items
+
 
 class ProgressWindow:
     """Janela de progresso com mensagens motivacionais"""
     
-    def __init__(self, parent, title="Processando..."):
+    # Uma janela por janela principal, reaproveitada entre as operações
+    _shared = {}
+    
+    @classmethod
+    def get(cls, parent) -> "ProgressWindow":
+        """
+        Retorna a janela de progresso da janela principal, criando-a na primeira vez
+        
+        Args:
+            parent: Qualquer widget da janela principal
+            
+        Returns:
+            Janela de progresso (oculta até show)
+        """
+        root = parent.winfo_toplevel()
+        window = cls._shared.get(str(root))
+        if window is None:
+            window = cls._shared[str(root)] = cls(root)
+        return window
+    
+    def __init__(self, parent):
+        self.parent = parent
         self.window = tk.Toplevel(parent)
-        self.window.title(title)
+        self.window.withdraw()
         self.window.geometry("400x150")
         self.window.resizable(False, False)
         self.window.transient(parent)
-        self.window.grab_set()
-        
-        # Centraliza a janela
-        self.window.geometry("+%d+%d" % (
-            parent.winfo_rootx() + 50,
-            parent.winfo_rooty() + 50
-        ))
+        # Fechar pelo gerenciador de janelas só oculta a janela
+        self.window.protocol("WM_DELETE_WINDOW", self.cancel)
         
         # Frame principal
         main_frame = ttk.Frame(self.window, padding="20")
         main_frame.pack(fill=tk.BOTH, expand=True)
         
         # Label de status
-        self.status_label = ttk.Label(main_frame, text="Iniciando...", font=("Arial", 10))
+        self._status_var = tk.StringVar(self.window, value="Iniciando...")
+        self.status_label = ttk.Label(main_frame, textvariable=self._status_var, font=("Arial", 10))
         self.status_label.pack(pady=(0, 10))
         
         # Barra de progresso indeterminada
         self.progress = ttk.Progressbar(main_frame, mode='indeterminate')
         self.progress.pack(fill=tk.X, pady=(0, 10))
-        self.progress.start()
         
         # Botão cancelar (opcional)
         self.cancel_button = ttk.Button(main_frame, text="Cancelar", command=self.cancel)
         self.cancel_button.pack()
         
         self.cancelled = False
+        
+        # O Tk só pode ser usado pelo thread principal: as threads de trabalho
+        # enfileiram (sessão, mensagem, atraso do fechamento) e a janela as
+        # aplica periodicamente
+        self._messages = queue.Queue()
+        self._last_status = None
+        self._closed = True
+        self._session = 0  # descarta mensagens e fechamentos de usos anteriores
+        self._drain_job = None  # verificação da fila agendada (uma por vez)
+    
+    def show(self, title: str = "Processando...", message: str = "Iniciando...") -> int:
+        """
+        Exibe a janela para uma nova operação (apenas no thread do Tk)
+        
+        Args:
+            title: Título da janela
+            message: Mensagem inicial de status
+        
+        Returns:
+            Sessão da operação, a ser passada a update_status e close_later
+        """
+        self._session += 1
+        self.cancelled = False
+        
+        self.window.title(title)
+        self._last_status = message
+        self._status_var.set(message)
+        
+        # Posiciona a janela sobre a janela principal
+        self.window.geometry("+%d+%d" % (
+            self.parent.winfo_rootx() + 50,
+            self.parent.winfo_rooty() + 50
+        ))
+        self.window.deiconify()
+        self.progress.start()
+        
+        if self._closed:
+            self._closed = False
+            self._drain_job = self.window.after(STATUS_POLL_MS, self._drain)
+        self._grab()
+        return self._session
+    
+    def _grab(self):
+        """Torna a janela modal assim que ela estiver visível"""
+        if self._closed:
+            return
+        try:
+            self.window.grab_set()
+        except tk.TclError:
+            # Ainda não mapeada (ex.: exibida antes da janela principal)
+            self.window.after(STATUS_POLL_MS, self._grab)
+    
+    def update_status(self, message: str, session: int):
+        """
+        Atualiza mensagem de status (pode ser chamado de qualquer thread)
+        
+        Args:
+            message: Mensagem de status
+            session: Sessão devolvida por show(); mensagens de outra operação são ignoradas
+        """
+        self._messages.put_nowait((session, message, None))
     
-    def update_status(self, message: str):
-        """Atualiza mensagem de status"""
-        self.status_label.config(text=message)
-        self.window.update()
+    def close_later(self, delay_ms: int, session: int):
+        """
+        Agenda o fechamento da janela (pode ser chamado de qualquer thread)
+        
+        Args:
+            delay_ms: Espera antes de fechar
+            session: Sessão devolvida por show(); ignorado se a janela já foi
+                     reaberta ou fechada (ex.: pelo botão Cancelar)
+        """
+        self._messages.put_nowait((session, None, delay_ms))
+    
+    def _drain(self):
+        """Mostra a mensagem mais recente da fila e reagenda a verificação"""
+        self._drain_job = None
+        if self._closed:
+            return
+        
+        # Mensagens em sequência rápida são agrupadas: só a última é exibida, e
+        # apenas se mudou (cada set é uma chamada ao interpretador Tcl)
+        status, close_delay = None, None
+        for session, message, delay in _drain_queue(self._messages):
+            if session != self._session:
+                continue
+            if message is not None:
+                status = message
+            if delay is not None:
+                close_delay = delay
+        
+        if status is not None and status != self._last_status:
+            self._last_status = status
+            self._status_var.set(status)
+        
+        if close_delay is not None:
+            self.window.after(close_delay, self.close, self._session)
+        
+        self._drain_job = self.window.after(STATUS_POLL_MS, self._drain)
     
     def cancel(self):
         """Cancela operação"""
         self.cancelled = True
         self.close()
     
-    def close(self):
-        """Fecha janela de progresso"""
+    def close(self, session: Optional[int] = None):
+        """Oculta a janela de progresso até o próximo show"""
+        if self._closed or (session is not None and session != self._session):
+            return
+        self._closed = True
+        # Um show logo em seguida não pode encontrar a verificação antiga ainda
+        # agendada: seriam duas percorrendo a mesma fila
+        if self._drain_job is not None:
+            self.window.after_cancel(self._drain_job)
+            self._drain_job = None
         self.progress.stop()
-        self.window.destroy()
+        self.window.grab_release()
+        self.window.withdraw()
+        
+        # Descarta o que sobrou desta operação
+        _drain_queue(self._messages)
 
 
 class ChatInterface:
     """Interface de chat com histórico"""
     
-    def __init__(self, parent, llm_system):
+    def __init__(self, parent, llm_system=None):
         self.parent = parent
         self.llm = llm_system
         self.setup_ui()
-
+        
+        # Mensagens enviadas antes de o sistema carregar aguardam na fila
+        self._llm_ready = threading.Event()
+        if llm_system is not None:
+            self._llm_ready.set()
+        
+        # Uma única thread atende as mensagens em ordem: o modelo responde uma
+        # por vez, então threads simultâneas só disputariam o servidor
+        self._requests = queue.Queue()
+        threading.Thread(target=self._worker, daemon=True).start()
+    
+    def set_llm(self, llm_system):
+        """Conecta o sistema LLM depois de carregado"""
+        self.llm = llm_system
+        self.apply_deterministic()
+        self._llm_ready.set()
+    
+    def apply_deterministic(self):
+        """Aplica ao sistema LLM a opção de respostas determinísticas"""
+        if self.llm is not None:
+            self.llm.set_deterministic(self.deterministic.get())
     
     def setup_ui(self):
         """Configura interface do chat"""
@@ -93,6 +304,7 @@ class ChatInterface:
         self.chat_display.tag_config("user", foreground="blue", font=("Arial", 10, "bold"))
         self.chat_display.tag_config("assistant", foreground="green", font=("Arial", 10))
         self.chat_display.tag_config("system", foreground="gray", font=("Arial", 9, "italic"))
+        self._sender_tag = {"Você": "user", "IA": "assistant"}
         
         # Frame para entrada
         input_frame = ttk.Frame(chat_frame)
@@ -116,29 +328,102 @@ class ChatInterface:
         ttk.Button(action_frame, text="Limpar Chat", command=self.clear_chat).pack(side=tk.LEFT)
         ttk.Button(action_frame, text="Copiar Última Resposta", command=self.copy_last_response).pack(side=tk.LEFT, padx=(10, 0))
         
+        # Respostas determinísticas permitem reaproveitar respostas do cache
+        self.deterministic = tk.BooleanVar(value=False)
+        ttk.Checkbutton(action_frame, text="Respostas determinísticas (usa cache)",
+                        variable=self.deterministic,
+                        command=self.apply_deterministic).pack(side=tk.RIGHT)
+        
         self.last_response = ""
+        self._send_busy = False
+        self._see_pending = False
+        self._stream_follow = True
+    
+    def set_busy(self, busy: bool):
+        """Alterna o botão enviar entre "Pensando..." e "Enviar", se necessário"""
+        if busy == self._send_busy:
+            return
+        self._send_busy = busy
+        if busy:
+            self.send_button.config(state=tk.DISABLED, text="Pensando...")
+        else:
+            self.send_button.config(state=tk.NORMAL, text="Enviar")
     
     def add_message(self, sender: str, message: str, tag: str = None):
         """Adiciona mensagem ao chat"""
         self.chat_display.config(state=tk.NORMAL)
         
         # Adiciona timestamp
-        import datetime
-        timestamp = datetime.datetime.now().strftime("%H:%M")
+        timestamp = time.strftime("%H:%M")
         
-        if sender == "Você":
-            self.chat_display.insert(tk.END, f"[{timestamp}] {sender}: ", "user")
-        elif sender == "IA":
-            self.chat_display.insert(tk.END, f"[{timestamp}] {sender}: ", "assistant")
-        else:
-            self.chat_display.insert(tk.END, f"[{timestamp}] {sender}: ", "system")
+        header_tag = self._sender_tag.get(sender, "system")
         
-        self.chat_display.insert(tk.END, f"{message}\n\n")
+        # A mensagem do próprio usuário sempre leva ao fim do chat
+        follow = sender == "Você" or self._at_end()
+        
+        # Cabeçalho formatado e corpo em uma única chamada ao Tcl
+        self.chat_display.insert(tk.END, f"[{timestamp}] {sender}: ", header_tag,
+                                 f"{message}\n\n", ())
+        
+        _trim_lines(self.chat_display, CHAT_MAX_LINES)
         
         if sender == "IA":
             self.last_response = message
         
         self.chat_display.config(state=tk.DISABLED)
+        if follow:
+            self.scroll_to_end()
+    
+    def begin_stream(self):
+        """Inicia no chat uma resposta da IA que chegará em trechos"""
+        # Decidido uma vez por resposta: quem rolou para cima para ler o
+        # histórico não é levado de volta ao fim a cada trecho
+        self._stream_follow = self._at_end()
+        
+        self.chat_display.config(state=tk.NORMAL)
+        self.chat_display.insert(tk.END, f"[{time.strftime('%H:%M')}] IA: ", "assistant", "\n\n", ())
+        # Os trechos entram antes do "\n\n" final; mensagens adicionadas
+        # enquanto isso continuam indo para o fim do chat
+        self.chat_display.mark_set("stream", "end-3c")
+        self.chat_display.config(state=tk.DISABLED)
+        if self._stream_follow:
+            self.scroll_to_end()
+    
+    def _append_token(self, token: str):
+        """Acrescenta um trecho à resposta em andamento"""
+        self.chat_display.config(state=tk.NORMAL)
+        self.chat_display.insert("stream", token)
+        self.chat_display.config(state=tk.DISABLED)
+        
+        # Rola apenas quando o trecho completa uma linha
+        if self._stream_follow and "\n" in token:
+            self.scroll_to_end()
+    
+    def end_stream(self, response: str):
+        """Conclui a resposta em andamento"""
+        self.chat_display.config(state=tk.NORMAL)
+        self.chat_display.mark_unset("stream")
+        _trim_lines(self.chat_display, CHAT_MAX_LINES)
+        self.chat_display.config(state=tk.DISABLED)
+        
+        self.last_response = response
+        if self._stream_follow:
+            self.scroll_to_end()
+    
+    def _at_end(self) -> bool:
+        """Indica se o chat está (ou já vai ser) rolado até o fim"""
+        return self._see_pending or self.chat_display.yview()[1] >= 0.999
+    
+    def scroll_to_end(self):
+        """Rola o chat até o fim uma vez, quando o Tk ficar ocioso"""
+        # Várias mensagens seguidas resultam em um único recálculo do layout
+        if not self._see_pending:
+            self._see_pending = True
+            self.parent.after_idle(self._do_see)
+    
+    def _do_see(self):
+        """Executa a rolagem agendada por scroll_to_end"""
+        self._see_pending = False
         self.chat_display.see(tk.END)
     
     def send_message(self):
@@ -154,26 +439,35 @@ class ChatInterface:
         self.add_message("Você", message)
         
         # Desabilita botão durante processamento
-        self.send_button.config(state=tk.DISABLED, text="Pensando...")
+        self.set_busy(True)
         
-        # Callback para processar resposta
-        def process_response():
+        # Envia para a thread de respostas
+        self._requests.put_nowait(message)
+    
+    def _worker(self):
+        """Gera as respostas das mensagens enfileiradas (executado em thread própria)"""
+        while True:
+            message = self._requests.get()
+            self._llm_ready.wait()
+            parts = []
             try:
-                # Aqui seria chamada a função da IA
-                # Por enquanto, resposta simulada
-                response = self.llm.generate_response(message)
-                
-                # Adiciona resposta da IA
-                self.parent.after(0, lambda: self.add_message("IA", response))
+                # Mostra a resposta da IA à medida que é gerada
+                self.parent.after(0, self.begin_stream)
+                for token in self.llm.generate_response_stream(message):
+                    if not parts:
+                        token = token.lstrip()
+                        if not token:
+                            continue
+                    parts.append(token)
+                    self.parent.after(0, self._append_token, token)
             except Exception as e:
-                self.parent.after(0, lambda e=e: self.add_message("Sistema", f"Erro: {str(e)}"))
-
+                self.parent.after(0, self.add_message, "Sistema", f"Erro: {str(e)}")
             finally:
-                # Reabilita botão
-                self.parent.after(0, lambda: self.send_button.config(state=tk.NORMAL, text="Enviar"))
-        
-        # Executa em thread separada
-        threading.Thread(target=process_response, daemon=True).start()
+                self.parent.after(0, self.end_stream, "".join(parts).strip())
+                
+                # Reabilita botão quando não há mais mensagens aguardando
+                if self._requests.empty():
+                    self.parent.after(0, self.set_busy, False)
     
     def clear_chat(self):
         """Limpa histórico do chat"""
@@ -196,11 +490,33 @@ class ChatInterface:
 class DocumentManager:
     """Gerenciador de documentos com upload e progresso"""
     
-    def __init__(self, parent, llm_system):
+    def __init__(self, parent, llm_system=None):
         self.parent = parent
+        self.llm_system = None
+        self.trainer = None
+        if llm_system is not None:
+            self.set_llm(llm_system)
+        
+        # Mensagens de status enviadas pelas threads de processamento
+        self._status_queue = queue.Queue()
+        self._last_status = None
+        
+        self.setup_ui()
+        self.parent.after(STATUS_POLL_MS, self._drain_status)
+    
+    def set_llm(self, llm_system):
+        """Conecta o sistema LLM depois de carregado"""
+        from llm_system import LLMTrainer
+        
         self.llm_system = llm_system
         self.trainer = LLMTrainer(llm_system)
-        self.setup_ui()
+    
+    def _check_ready(self) -> bool:
+        """Avisa o usuário se o sistema LLM ainda não terminou de carregar"""
+        if self.llm_system is None:
+            messagebox.showinfo("Aguarde", "O sistema ainda está carregando. Tente novamente em instantes.")
+            return False
+        return True
     
     def setup_ui(self):
         """Configura interface de gerenciamento de documentos"""
@@ -230,19 +546,39 @@ class DocumentManager:
         self.add_status("Sistema iniciado. Pronto para receber documentos!")
     
     def add_status(self, message: str):
-        """Adiciona mensagem ao status"""
-        import datetime
-        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+        """Adiciona mensagem ao status (pode ser chamado de qualquer thread)"""
+        timestamp = time.strftime("%H:%M:%S")
+        
+        # Ignora a repetição imediata da mesma mensagem no mesmo segundo
+        if (timestamp, message) == self._last_status:
+            return
+        self._last_status = (timestamp, message)
         
-        self.status_text.config(state=tk.NORMAL)
-        self.status_text.insert(tk.END, f"[{timestamp}] {message}\n")
-        self.status_text.config(state=tk.DISABLED)
-        self.status_text.see(tk.END)
+        self._status_queue.put_nowait(f"[{timestamp}] {message}\n")
+    
+    def _drain_status(self):
+        """Insere as mensagens de status pendentes e reagenda a verificação"""
+        lines = _drain_queue(self._status_queue)
+        if lines:
+            # Só acompanha o fim se o usuário não rolou para cima
+            at_end = self.status_text.yview()[1] >= 0.999
+            
+            self.status_text.config(state=tk.NORMAL)
+            self.status_text.insert(tk.END, "".join(lines))
+            _trim_lines(self.status_text, STATUS_MAX_LINES)
+            self.status_text.config(state=tk.DISABLED)
+            if at_end:
+                self.status_text.see(tk.END)
+        
+        self.parent.after(STATUS_POLL_MS, self._drain_status)
     
     def add_documents(self):
         """Adiciona documentos à base de conhecimento"""
+        if not self._check_ready():
+            return
+        
         file_types = [
-            ("Todos os suportados", "*.pdf;*.docx;*.txt"),
+            ("Todos os suportados", ("*.pdf", "*.docx", "*.txt")),
             ("PDF", "*.pdf"),
             ("Word", "*.docx"),
             ("Texto", "*.txt"),
@@ -257,37 +593,58 @@ class DocumentManager:
         if not files:
             return
         
-        # Processa arquivos em thread separada
+        # A janela é exibida aqui, no thread do Tk; a thread só enfileira mensagens
+        progress_window = ProgressWindow.get(self.parent)
+        session = progress_window.show("Aprendendo com documentos...")
+        
+        # Processa arquivos em thread separada, vários ao mesmo tempo
         def process_files():
-            progress_window = ProgressWindow(self.parent, "Aprendendo com documentos...")
+            total = len(files)
+            done = 0  # alterado apenas por esta thread; lido pelos callbacks
+            
+            def process_file(file_path):
+                filename = os.path.basename(file_path)
+                
+                def progress_callback(message):
+                    progress_window.update_status(f"[{done}/{total}] {filename}: {message}", session)
+                
+                self.add_status(f"Processando: {filename}")
+                return self.trainer.train_with_document(file_path, progress_callback)
             
             try:
-                for i, file_path in enumerate(files):
-                    filename = os.path.basename(file_path)
-                    
-                    def progress_callback(message):
-                        progress_window.update_status(f"[{i+1}/{len(files)}] {filename}: {message}")
-                    
-                    self.parent.after(0, lambda f=filename: self.add_status(f"Processando: {f}"))
+                with ThreadPoolExecutor(max_workers=min(INGEST_WORKERS, total)) as executor:
+                    futures = {executor.submit(process_file, file_path): file_path
+                               for file_path in files}
                     
-                    success = self.trainer.train_with_document(file_path, progress_callback)
-                    
-                    if success:
-                        self.parent.after(0, lambda f=filename: self.add_status(f"✅ {f} processado com sucesso!"))
-                    else:
-                        self.parent.after(0, lambda f=filename: self.add_status(f"❌ Erro ao processar {f}"))
+                    # Informa cada arquivo assim que termina, em qualquer ordem
+                    for future in as_completed(futures):
+                        filename = os.path.basename(futures[future])
+                        done += 1
+                        
+                        try:
+                            success = future.result()
+                        except Exception:
+                            success = False
+                        
+                        if success:
+                            self.add_status(f"✅ {filename} processado com sucesso!")
+                        else:
+                            self.add_status(f"❌ Erro ao processar {filename}")
                 
-                progress_window.update_status("🎉 Todos os documentos foram processados!")
-                self.parent.after(2000, progress_window.close)
+                progress_window.update_status("🎉 Todos os documentos foram processados!", session)
+                progress_window.close_later(2000, session)
                 
             except Exception as e:
-                progress_window.update_status(f"Erro: {str(e)}")
-                self.parent.after(3000, progress_window.close)
+                progress_window.update_status(f"Erro: {str(e)}", session)
+                progress_window.close_later(3000, session)
         
         threading.Thread(target=process_files, daemon=True).start()
     
     def show_stats(self):
         """Mostra estatísticas da base de conhecimento"""
+        if not self._check_ready():
+            return
+        
         try:
             stats = self.llm_system.get_knowledge_stats()
             
@@ -311,6 +668,9 @@ class DocumentManager:
     
     def reset_knowledge(self):
         """Reseta toda a base de conhecimento"""
+        if not self._check_ready():
+            return
+        
         result = messagebox.askyesnocancel(
             "⚠️ Confirmar Reset",
             "Deseja deletar toda a base de conhecimento?\n\n"
@@ -342,41 +702,90 @@ class MainApplication:
         except:
             pass
         
-        # Inicializa sistema LLM
-        self.llm = LocalLLM()
-        self.setup_system()
+        # Tarefas demoradas (verificação e configuração do servidor) rodam em
+        # uma única thread, com o resultado devolvido ao thread do Tk
+        self._tasks = queue.Queue()
+        threading.Thread(target=self._run_tasks, daemon=True).start()
+        
+        # O sistema LLM (ChromaDB, modelo de embeddings) é carregado em
+        # background, para que a janela apareça antes
+        self.llm = None
         
         # Configura interface
         self.setup_ui()
+        self.setup_system()
         
         # Configura fechamento
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
     
-    def setup_system(self):
-        """Configura sistema LLM em background"""
-        def setup():
+    def run_in_background(self, func, *args, on_done=None):
+        """
+        Executa uma função na thread de tarefas, fora do thread do Tk
+        
+        Args:
+            func: Função a executar
+            *args: Argumentos da função
+            on_done: Chamada no thread do Tk com (resultado, exceção) ao terminar
+        """
+        self._tasks.put_nowait((func, args, on_done))
+    
+    def _run_tasks(self):
+        """Executa as tarefas enfileiradas, em ordem (executado em thread própria)"""
+        while True:
+            func, args, on_done = self._tasks.get()
+            result, error = None, None
             try:
-                # Verifica se sistema já está configurado
-                if not self.llm.is_server_running():
-                    progress_window = ProgressWindow(self.root, "Configurando Sistema...")
-                    
-                    def progress_callback(message):
-                        progress_window.update_status(message)
-                    
-                    success = self.llm.setup_system(progress_callback)
-                    
-                    if success:
-                        progress_window.update_status("✅ Sistema configurado com sucesso!")
-                        self.root.after(2000, progress_window.close)
-                    else:
-                        progress_window.update_status("❌ Erro na configuração")
-                        self.root.after(3000, progress_window.close)
-                        
+                result = func(*args)
             except Exception as e:
-                messagebox.showerror("Erro", f"Erro na configuração: {str(e)}")
+                error = e
+            
+            if on_done is not None:
+                self.root.after(0, on_done, result, error)
+    
+    def setup_system(self):
+        """Configura sistema LLM em background"""
+        # A janela aparece antes de qualquer trabalho, para que carregar o
+        # sistema e consultar o servidor nunca fiquem sem retorno ao usuário
+        progress_window = ProgressWindow.get(self.root)
+        session = progress_window.show("Configurando Sistema...", "Carregando sistema...")
         
-        # Executa configuração em thread separada
-        threading.Thread(target=setup, daemon=True).start()
+        def setup():
+            from llm_system import LocalLLM
+            
+            self.llm = LocalLLM()
+            self.root.after(0, self._attach_llm)
+            
+            # Verifica se sistema já está configurado
+            progress_window.update_status("Verificando servidor...", session)
+            if self.llm.is_server_running():
+                self.llm.warmup()
+                progress_window.close_later(0, session)
+                return
+            
+            def progress_callback(message):
+                progress_window.update_status(message, session)
+            
+            success = self.llm.setup_system(progress_callback)
+            
+            if success:
+                progress_window.update_status("✅ Sistema configurado com sucesso!", session)
+                progress_window.close_later(2000, session)
+            else:
+                progress_window.update_status("❌ Erro na configuração", session)
+                progress_window.close_later(3000, session)
+        
+        def finished(result, error):
+            if error is not None:
+                progress_window.close(session)
+                messagebox.showerror("Erro", f"Erro na configuração: {str(error)}")
+        
+        # Executa configuração na thread de tarefas
+        self.run_in_background(setup, on_done=finished)
+    
+    def _attach_llm(self):
+        """Entrega o sistema LLM carregado aos componentes da interface"""
+        self.doc_manager.set_llm(self.llm)
+        self.chat_interface.set_llm(self.llm)
     
     def setup_ui(self):
         """Configura interface principal"""
@@ -439,56 +848,32 @@ class MainApplication:
     
     def show_help(self):
         """Mostra ajuda"""
-        help_text = """🤖 Como usar o Sistema LLM Local:
-
-1. 📁 Adicionar Documentos:
-   • Clique em "Adicionar Documentos"
-   • Selecione arquivos PDF, DOCX ou TXT
-   • Aguarde o processamento (aparecerá "Obrigado! Já aprendi tudo!")
-
-2. 💬 Conversar:
-   • Digite sua pergunta na caixa de texto
-   • Clique "Enviar" ou use Ctrl+Enter
-   • A IA responderá baseada nos documentos
-
-3. 🔧 Gerenciar:
-   • "Ver Estatísticas": mostra quantos documentos foram processados
-   • "Recomeçar do Zero": apaga toda a base de conhecimento
-   • "Limpar Chat": limpa apenas o histórico da conversa
-
-4. 💡 Dicas:
-   • Faça perguntas específicas sobre o conteúdo dos documentos
-   • A IA citará a fonte quando possível
-   • Use "Copiar Última Resposta" para copiar respostas longas"""
-        
-        messagebox.showinfo("Como usar", help_text)
+        messagebox.showinfo("Como usar", _HELP_TEXT)
     
     def show_about(self):
         """Mostra informações sobre o sistema"""
-        about_text = """🤖 Sistema LLM Local v1.0
-
-Desenvolvido com:
-• Python + Tkinter (Interface)
-• Ollama + Llama 3.1 (IA)
-• ChromaDB (Busca semântica)
-• PyPDF2, python-docx (Processamento)
-
-Características:
-✅ 100% Local e Offline
-✅ Gratuito e Open Source  
-✅ Suporte ao Português
-✅ Persistência de dados
-✅ Interface amigável
-
-Criado para aprender com seus documentos
-e responder perguntas de forma inteligente!"""
-        
-        messagebox.showinfo("Sobre", about_text)
+        messagebox.showinfo("Sobre", _ABOUT_TEXT)
     
     def on_closing(self):
         """Trata fechamento da aplicação"""
-        if messagebox.askokcancel("Sair", "Deseja fechar o sistema?"):
+        if not messagebox.askokcancel("Sair", "Deseja fechar o sistema?"):
+            return
+        
+        if self.llm is None:
             self.root.destroy()
+            return
+        
+        # Os chunks ainda pendentes são enviados ao ChromaDB antes de sair
+        progress_window = ProgressWindow.get(self.root)
+        progress_window.show("Encerrando...", "Finalizando a indexação dos documentos...")
+        
+        def shutdown():
+            try:
+                self.llm.close()
+            finally:
+                self.root.after(0, self.root.destroy)
+        
+        threading.Thread(target=shutdown, daemon=True).start()
     
     def run(self):
         """Executa aplicação"""
@@ -4,41 +4,190 @@ Módulo responsável pela integração com Ollama/Llama e geração de respostas
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+import hashlib
 import logging
 import subprocess
 import time
-from typing import List, Dict, Any, Optional
+import random
+import itertools
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Iterator, Tuple
 from document_processor import DocumentProcessor
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Configuração de logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Respostas guardadas no cache (as menos usadas são descartadas)
+RESPONSE_CACHE_SIZE = 256
+
+# Similaridade cosseno mínima para reaproveitar a resposta de uma pergunta equivalente
+SEMANTIC_CACHE_THRESHOLD = 0.9
+
+# O cache só é usado com amostragem (quase) determinística; acima disso
+# perguntas repetidas devem poder receber respostas diferentes
+CACHE_MAX_TEMPERATURE = 0.2
+
+# Tempo máximo (s) aguardando o servidor Ollama subir
+SERVER_START_TIMEOUT = 30.0
+
+# Tempo máximo (s) sem notícias do download do modelo antes de desistir
+PULL_STALL_TIMEOUT = 300.0
+
+# Buscas na base de conhecimento guardadas por pergunta
+RETRIEVAL_CACHE_SIZE = 512
+
+# Requisições simultâneas de generate_batch; o Ollama atende em paralelo até
+# OLLAMA_NUM_PARALLEL delas e enfileira as demais
+BATCH_MAX_WORKERS = 4
+
+# Instruções do sistema e cabeçalhos das seções do prompt. A ordem das seções
+# vai do mais estável ao que muda a cada pergunta, para que o Ollama
+# reaproveite o cache KV do início do prompt entre as chamadas
+_SYSTEM_PROMPT = """Você é um assistente inteligente que responde perguntas baseado em documentos fornecidos pelo usuário. 
+
+Instruções:
+- Responda sempre em português brasileiro
+- Use apenas as informações dos documentos fornecidos quando disponíveis
+- Se não houver informação suficiente nos documentos, diga que não encontrou a informação
+- Seja preciso e objetivo
+- Cite a fonte quando possível (nome do arquivo)
+"""
+_CONTEXT_HEADER = "\n\nContexto dos documentos:\n"
+_EXTRA_CONTEXT_HEADER = "\n\nContexto adicional:\n"
+_QUESTION_HEADER = "\n\nPergunta do usuário: "
+_ANSWER_TAIL = "\n\nResposta:"
+
+# Tokens iniciais que o Ollama preserva ao descartar contexto (num_keep): as
+# instruções do sistema. Sem o tokenizador do modelo, usa o número de palavras,
+# que nunca passa do número de tokens
+_SYSTEM_PROMPT_KEEP = len(_SYSTEM_PROMPT.split())
+
+# Cabeçalho das requisições cujo corpo JSON já vai serializado
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def _dumps(obj: Any) -> bytes:
+    """Serializa para JSON em UTF-8, com orjson quando disponível"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode()
+
+
+# Lê JSON de bytes ou str (orjson, quando disponível, é bem mais rápido)
+_loads = orjson.loads if orjson is not None else json.loads
+
+
 class LocalLLM:
     """Classe para integração com LLM local via Ollama"""
     
-    def __init__(self, model_name: str = "llama3.1:8b", base_url: str = "http://localhost:11434"):
+    def __init__(self, model_name: str = "llama3.1:8b", base_url: str = "http://localhost:11434",
+                 history_cap: int = 200, temperature: float = 0.7):
         """
         Inicializa o sistema LLM
         
         Args:
             model_name: Nome do modelo Ollama
             base_url: URL base do servidor Ollama
+            history_cap: Máximo de trocas mantidas no histórico (as mais antigas são descartadas)
+            temperature: Temperatura da amostragem; até CACHE_MAX_TEMPERATURE as
+                respostas são reaproveitadas pelo cache
         """
         self.model_name = model_name
         self.base_url = base_url
+        
+        # Sessão HTTP única: as conexões com o Ollama ficam abertas entre as
+        # chamadas. Falhas de conexão não são repetidas, para que a verificação
+        # do servidor continue respondendo rápido quando ele está parado
+        self._http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16,
+                              max_retries=Retry(total=2, connect=0, backoff_factor=0.3))
+        self._http.mount("http://", adapter)
+        self._http.mount("https://", adapter)
+        
         self.document_processor = DocumentProcessor()
-        self.conversation_history = []
+        self.conversation_history = deque(maxlen=history_cap)
+        self._history_snapshot: Optional[Tuple[Dict[str, Any], ...]] = ()
+        self._history_lock = threading.Lock()
+        self.temperature = temperature
+        self._sampling_temperature = temperature
+        
+        # Cache de respostas: prompt completo exato -> resposta, e embeddings das
+        # perguntas já respondidas para encontrar perguntas equivalentes
+        self._exact_cache: "OrderedDict[str, str]" = OrderedDict()
+        self._semantic_vectors = None
+        self._semantic_entries: List[Tuple[str, str]] = []  # (escopo, chave exata)
+        
+        # Contexto encontrado para cada pergunta; descartado quando os documentos mudam
+        self._retrieval_cache: "OrderedDict[bytes, str]" = OrderedDict()
+        self._retrieval_lock = threading.Lock()
+        
+        # Versão do Ollama já encontrada (não muda durante a execução)
+        self._version: Optional[str] = None
         
+    def close(self):
+        """Fecha as conexões HTTP e a base de conhecimento, indexando os chunks pendentes"""
+        self._http.close()
+        self.document_processor.close()
+    
+    def __del__(self):
+        # Sem indexar o que falta: o DocumentProcessor é fechado pelo próprio __del__
+        try:
+            self._http.close()
+        except Exception:
+            pass
+    
     def check_ollama_installation(self) -> bool:
         """Verifica se Ollama está instalado"""
+        return self.ollama_version() is not None
+    
+    def ollama_version(self) -> Optional[str]:
+        """
+        Retorna a versão do Ollama, ou None se não estiver instalado
+        
+        Com o servidor no ar a versão vem de /api/version, sem abrir um processo;
+        caso contrário, de `ollama --version`. O resultado fica guardado.
+        
+        Returns:
+            Número da versão (ex.: "0.3.12")
+        """
+        if self._version is not None:
+            return self._version
+        
         try:
-            result = subprocess.run(['ollama', '--version'], 
-                                  capture_output=True, text=True, timeout=10)
-            return result.returncode == 0
-        except (subprocess.TimeoutExpired, FileNotFoundError):
-            return False
+            response = self._http.get(f"{self.base_url}/api/version", timeout=0.5)
+            if response.status_code == 200:
+                self._version = _loads(response.content).get('version')
+        except (requests.RequestException, ValueError, AttributeError):
+            # Resposta que não é o JSON do Ollama (ex.: página de um proxy)
+            self._version = None
+        
+        if self._version is None:
+            try:
+                result = subprocess.run(['ollama', '--version'],
+                                      capture_output=True, text=True, timeout=10)
+                # "ollama version is X" ou, sem servidor, "Warning: client version is X"
+                if result.returncode == 0 and result.stdout.split():
+                    self._version = result.stdout.split()[-1]
+            except (subprocess.TimeoutExpired, FileNotFoundError):
+                pass
+        
+        return self._version
     
     def install_ollama(self) -> bool:
         """Instala Ollama (Linux/Mac)"""
@@ -69,21 +218,37 @@ class LocalLLM:
                            stdout=subprocess.DEVNULL, 
                            stderr=subprocess.DEVNULL)
             
-            # Aguarda o servidor iniciar
-            for _ in range(30):  # 30 segundos timeout
-                time.sleep(1)
-                if self.is_server_running():
+            # Aguarda o servidor iniciar, verificando com intervalos crescentes
+            # (50 ms, 100 ms, ... até 1 s): um servidor que sobe rápido é
+            # detectado logo, sem deixar de esperar os mais lentos
+            delay = 0.05
+            deadline = time.monotonic() + SERVER_START_TIMEOUT
+            while time.monotonic() < deadline:
+                if self.is_server_running(timeout=0.5):
                     return True
+                time.sleep(delay)
+                delay = min(delay * 2, 1.0)
             
             return False
         except Exception as e:
             logger.error(f"Erro ao iniciar servidor Ollama: {e}")
             return False
     
-    def is_server_running(self) -> bool:
-        """Verifica se o servidor Ollama está rodando"""
+    def is_server_running(self, timeout: float = 5.0) -> bool:
+        """
+        Verifica se o servidor Ollama está rodando
+        
+        Args:
+            timeout: Tempo máximo (s) aguardando a resposta do servidor
+        
+        Returns:
+            True se o servidor respondeu
+        """
         try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
+            # Conexão recusada ou sem resposta em 0,5 s indica servidor parado;
+            # uma vez conectado, o servidor tem até timeout para responder
+            response = self._http.get(f"{self.base_url}/api/tags",
+                                      timeout=(min(0.5, timeout), timeout))
             return response.status_code == 200
         except:
             return False
@@ -95,9 +260,9 @@ class LocalLLM:
                 progress_callback("Verificando modelo...")
             
             # Verifica se modelo já existe
-            response = requests.get(f"{self.base_url}/api/tags")
+            response = self._http.get(f"{self.base_url}/api/tags")
             if response.status_code == 200:
-                models = response.json().get('models', [])
+                models = _loads(response.content).get('models', [])
                 for model in models:
                     if self.model_name in model.get('name', ''):
                         logger.info(f"Modelo {self.model_name} já está disponível")
@@ -107,16 +272,78 @@ class LocalLLM:
                 progress_callback("Baixando modelo... Isso pode demorar alguns minutos...")
             
             logger.info(f"Baixando modelo {self.model_name}...")
-            result = subprocess.run([
-                'ollama', 'pull', self.model_name
-            ], capture_output=True, text=True, timeout=1800)  # 30 minutos timeout
             
-            return result.returncode == 0
+            # O servidor envia o progresso em linhas JSON; o timeout de leitura
+            # vale entre uma linha e outra, então só um download parado é interrompido
+            with self._http.post(
+                f"{self.base_url}/api/pull",
+                data=_dumps({"model": self.model_name, "stream": True}),
+                headers=_JSON_HEADERS,
+                stream=True,
+                timeout=(5, PULL_STALL_TIMEOUT)
+            ) as response:
+                if response.status_code != 200:
+                    logger.error(f"Erro ao baixar modelo: {response.status_code}")
+                    return False
+                
+                last_message = None
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    
+                    data = _loads(line)
+                    if 'error' in data:
+                        logger.error(f"Erro ao baixar modelo: {data['error']}")
+                        return False
+                    
+                    status = data.get('status', '')
+                    if status == 'success':
+                        return True
+                    
+                    message = f"Baixando modelo... {status}"
+                    if data.get('total') and 'completed' in data:
+                        message += f" ({data['completed'] * 100 // data['total']}%)"
+                    
+                    # Só repassa quando muda (o servidor repete a mesma porcentagem)
+                    if progress_callback and message != last_message:
+                        progress_callback(message)
+                    last_message = message
+            
+            logger.error("Download do modelo terminou sem confirmação do servidor")
+            return False
             
         except Exception as e:
             logger.error(f"Erro ao baixar modelo: {e}")
             return False
     
+    def warmup(self):
+        """
+        Carrega o modelo no Ollama em segundo plano, antes da primeira pergunta
+        
+        Deve ser chamado quando o servidor estiver no ar (após setup_system ou
+        ao encontrá-lo já rodando); retorna imediatamente.
+        """
+        threading.Thread(target=self._warmup, name="ollama-warmup", daemon=True).start()
+    
+    def _warmup(self):
+        """Carrega o modelo no Ollama e o modelo de embeddings (executado em thread própria)"""
+        try:
+            # Gera um único token a partir das instruções do sistema: o modelo fica
+            # carregado e o início de todo prompt já está no cache KV do servidor
+            payload = self._generate_payload(_SYSTEM_PROMPT, stream=False)
+            payload["options"]["num_predict"] = 1
+            self._http.post(
+                f"{self.base_url}/api/generate",
+                data=_dumps(payload),
+                headers=_JSON_HEADERS,
+                timeout=120
+            )
+            
+            if self.document_processor.embedder is not None:
+                self.document_processor.embed(["ok"])
+        except Exception as e:
+            logger.warning(f"Aquecimento do modelo falhou: {e}")
+    
     def setup_system(self, progress_callback=None) -> bool:
         """Configura todo o sistema LLM"""
         try:
@@ -140,6 +367,9 @@ class LocalLLM:
             if not self.download_model(progress_callback):
                 return False
             
+            # Carrega o modelo em segundo plano enquanto a interface termina de abrir
+            self.warmup()
+            
             if progress_callback:
                 progress_callback("Sistema configurado com sucesso!")
             
@@ -149,10 +379,210 @@ class LocalLLM:
             logger.error(f"Erro na configuração do sistema: {e}")
             return False
     
+    def _build_prompt(self, prompt: str, context: str = "", use_context: bool = True,
+                      relevant_context: Optional[str] = None):
+        """
+        Monta o prompt completo com as instruções e o contexto dos documentos
+        
+        Args:
+            prompt: Pergunta do usuário
+            context: Contexto adicional dos documentos
+            use_context: Se deve usar contexto dos documentos
+            relevant_context: Contexto já buscado nos documentos (evita nova busca)
+        
+        Returns:
+            Tupla (prompt completo, contexto encontrado nos documentos)
+        """
+        # Busca contexto relevante se solicitado
+        if relevant_context is None:
+            relevant_context = self._retrieve_context(prompt) if use_context else ""
+        
+        # Constrói o prompt completo: instruções fixas, o contexto adicional
+        # (o mesmo ao longo da conversa) e só então o que muda a cada pergunta
+        parts = [_SYSTEM_PROMPT]
+        
+        if context:
+            parts += [_EXTRA_CONTEXT_HEADER, context]
+        
+        if relevant_context:
+            parts += [_CONTEXT_HEADER, relevant_context]
+        
+        parts += [_QUESTION_HEADER, prompt, _ANSWER_TAIL]
+        full_prompt = "".join(parts)
+        
+        return full_prompt, relevant_context
+    
+    def _retrieve_context(self, prompt: str) -> str:
+        """
+        Busca nos documentos o contexto para a pergunta, reaproveitando buscas anteriores
+        
+        Args:
+            prompt: Pergunta do usuário
+        
+        Returns:
+            Trechos mais relevantes formatados para o prompt (vazio se nenhum)
+        """
+        return self._retrieve_context_many([prompt])[0]
+    
+    def _retrieve_context_many(self, prompts: List[str]) -> List[str]:
+        """
+        Busca o contexto de várias perguntas, com uma única consulta para as não guardadas
+        
+        Args:
+            prompts: Perguntas do usuário
+        
+        Returns:
+            Contexto formatado de cada pergunta, na mesma ordem
+        """
+        keys = [hashlib.blake2b(prompt.encode(), digest_size=16).digest() for prompt in prompts]
+        contexts: List[Optional[str]] = [None] * len(prompts)
+        with self._retrieval_lock:
+            for i, key in enumerate(keys):
+                relevant_context = self._retrieval_cache.get(key)
+                if relevant_context is not None:
+                    self._retrieval_cache.move_to_end(key)
+                    contexts[i] = relevant_context
+        
+        missing = [i for i, relevant_context in enumerate(contexts) if relevant_context is None]
+        if not missing:
+            return contexts
+        
+        # Com chunks ainda aguardando o ChromaDB, a busca pode usar palavras-chave
+        # ou uma coleção incompleta e mudar quando a indexação terminar
+        pending = self.document_processor.pending_count()
+        
+        # Embeddings das perguntas calculados em lote e uma só consulta ao ChromaDB
+        all_results = self.document_processor.search_knowledge_many(
+            [prompts[i] for i in missing]
+        )
+        for i, search_results in zip(missing, all_results):
+            contexts[i] = "\n\n".join([
+                f"[{result['filename']}]: {result['content']}"
+                for result in search_results[:3]  # Top 3 resultados
+            ])
+        
+        # Só guarda o resultado se não havia nada pendente nem antes nem depois da
+        # busca (a thread de indexação pode ter esvaziado a fila durante ela)
+        if pending == 0 and self.document_processor.pending_count() == 0:
+            with self._retrieval_lock:
+                for i in missing:
+                    self._retrieval_cache[keys[i]] = contexts[i]
+                while len(self._retrieval_cache) > RETRIEVAL_CACHE_SIZE:
+                    self._retrieval_cache.popitem(last=False)
+        
+        return contexts
+    
+    def clear_retrieval_cache(self):
+        """Descarta as buscas guardadas (chamado quando os documentos mudam)"""
+        with self._retrieval_lock:
+            self._retrieval_cache.clear()
+    
+    def set_deterministic(self, enabled: bool):
+        """
+        Alterna entre respostas determinísticas e a temperatura escolhida na criação
+        
+        Com respostas determinísticas (temperatura 0) perguntas repetidas ou
+        equivalentes são respondidas pelo cache, sem consultar o modelo.
+        
+        Args:
+            enabled: Se as respostas devem ser determinísticas
+        """
+        self.temperature = 0.0 if enabled else self._sampling_temperature
+    
+    def _cache_enabled(self) -> bool:
+        """Indica se as respostas podem ser reaproveitadas com a temperatura atual"""
+        return self.temperature <= CACHE_MAX_TEMPERATURE
+    
+    def _cache_lookup(self, full_prompt: str, prompt: str, scope: str):
+        """
+        Procura uma resposta já gerada para o mesmo prompt ou para uma pergunta equivalente
+        
+        Args:
+            full_prompt: Prompt completo enviado ao modelo
+            prompt: Pergunta do usuário
+            scope: Contexto usado no prompt; só perguntas com o mesmo contexto são equivalentes
+        
+        Returns:
+            Tupla (resposta ou None, chave exata, embedding da pergunta ou None)
+        """
+        key = hashlib.sha256(f"{self.model_name}\0{full_prompt}".encode()).hexdigest()
+        answer = self._exact_cache.get(key)
+        if answer is not None:
+            self._exact_cache.move_to_end(key)
+            return answer, key, None
+        
+        # Sem modelo de embeddings local, apenas o cache exato é usado
+        if np is None or self.document_processor.embedder is None:
+            return None, key, None
+        
+        vector = np.asarray(self.document_processor.embed([prompt])[0], dtype=np.float32)
+        if self._semantic_vectors is not None:
+            # Embeddings normalizados: o produto interno é a similaridade cosseno
+            similarities = self._semantic_vectors @ vector
+            for i in np.argsort(similarities)[::-1]:
+                if similarities[i] < SEMANTIC_CACHE_THRESHOLD:
+                    break
+                entry_scope, entry_key = self._semantic_entries[i]
+                answer = self._exact_cache.get(entry_key)
+                if entry_scope == scope and answer is not None:
+                    self._exact_cache.move_to_end(entry_key)
+                    return answer, key, vector
+        
+        return None, key, vector
+    
+    def _cache_store(self, key: str, vector, scope: str, answer: str):
+        """Guarda uma resposta gerada no cache exato e, se houver embedding, no semântico"""
+        if not answer:
+            return
+        
+        self._exact_cache[key] = answer
+        self._exact_cache.move_to_end(key)
+        while len(self._exact_cache) > RESPONSE_CACHE_SIZE:
+            self._exact_cache.popitem(last=False)
+        
+        if vector is None:
+            return
+        
+        self._semantic_entries.append((scope, key))
+        if self._semantic_vectors is None:
+            self._semantic_vectors = vector[np.newaxis, :]
+        else:
+            self._semantic_vectors = np.vstack([self._semantic_vectors, vector])
+        
+        # Remove os embeddings cujas respostas já saíram do cache exato
+        if len(self._semantic_entries) > 2 * RESPONSE_CACHE_SIZE:
+            keep = [i for i, (_, entry_key) in enumerate(self._semantic_entries)
+                    if entry_key in self._exact_cache]
+            self._semantic_entries = [self._semantic_entries[i] for i in keep]
+            self._semantic_vectors = self._semantic_vectors[keep] if keep else None
+    
+    def clear_response_cache(self):
+        """Descarta todas as respostas guardadas no cache"""
+        self._exact_cache.clear()
+        self._semantic_vectors = None
+        self._semantic_entries = []
+    
+    def _generate_payload(self, full_prompt: str, stream: bool) -> Dict[str, Any]:
+        """Monta o corpo da requisição para /api/generate"""
+        return {
+            "model": self.model_name,
+            "prompt": full_prompt,
+            "stream": stream,
+            "options": {
+                "temperature": self.temperature,
+                "top_p": 0.9,
+                "max_tokens": 2000,
+                "num_keep": _SYSTEM_PROMPT_KEEP
+            }
+        }
+    
     def generate_response(self, prompt: str, context: str = "", use_context: bool = True) -> str:
         """
         Gera resposta usando o modelo LLM
         
+        Com temperatura até CACHE_MAX_TEMPERATURE, prompts repetidos e perguntas
+        equivalentes (mesmo contexto) são respondidos pelo cache, sem o modelo.
+        
         Args:
             prompt: Pergunta do usuário
             context: Contexto adicional dos documentos
@@ -161,75 +591,139 @@ class LocalLLM:
         Returns:
             Resposta gerada pelo modelo
         """
+        # Mesmo caminho da resposta em trechos: cache, histórico e erros são
+        # tratados em generate_response_stream
+        return "".join(self.generate_response_stream(prompt, context, use_context)).strip()
+    
+    def _complete(self, full_prompt: str) -> Optional[str]:
+        """
+        Envia um prompt completo ao Ollama e aguarda a resposta inteira
+        
+        Args:
+            full_prompt: Prompt já montado por _build_prompt
+        
+        Returns:
+            Resposta do modelo, ou None se o servidor respondeu com erro
+        """
+        response = self._http.post(
+            f"{self.base_url}/api/generate",
+            data=_dumps(self._generate_payload(full_prompt, stream=False)),
+            headers=_JSON_HEADERS,
+            timeout=120
+        )
+        
+        if response.status_code != 200:
+            logger.error(f"Erro na requisição: {response.status_code}")
+            return None
+        
+        return _loads(response.content).get('response', '').strip()
+    
+    def generate_batch(self, prompts: List[str], use_context: bool = True,
+                       max_workers: int = BATCH_MAX_WORKERS) -> List[str]:
+        """
+        Gera respostas para várias perguntas com requisições simultâneas ao Ollama
+        
+        Útil para responder muitas perguntas de uma vez (ex.: avaliações); as
+        perguntas são independentes e não entram no histórico da conversa.
+        
+        Args:
+            prompts: Perguntas do usuário
+            use_context: Se deve usar contexto dos documentos
+            max_workers: Máximo de requisições em andamento ao mesmo tempo
+        
+        Returns:
+            Respostas, na mesma ordem das perguntas
+        """
+        def answer(prompt: str, relevant_context: str) -> str:
+            try:
+                full_prompt, _ = self._build_prompt(prompt, relevant_context=relevant_context)
+                result = self._complete(full_prompt)
+                if result is None:
+                    return "Desculpe, ocorreu um erro ao gerar a resposta."
+                return result
+            except Exception as e:
+                logger.error(f"Erro ao gerar resposta: {e}")
+                return "Desculpe, ocorreu um erro ao processar sua pergunta."
+        
+        if not prompts:
+            return []
+        
+        # A busca nos documentos é feita antes, em lote, para todas as perguntas
+        if use_context:
+            try:
+                contexts = self._retrieve_context_many(prompts)
+            except Exception as e:
+                logger.error(f"Erro ao buscar contexto: {e}")
+                return ["Desculpe, ocorreu um erro ao processar sua pergunta."] * len(prompts)
+        else:
+            contexts = [""] * len(prompts)
+        
+        # Cada thread só aguarda a rede; a geração acontece no servidor
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(prompts))) as executor:
+            return list(executor.map(answer, prompts, contexts))
+    
+    def generate_response_stream(self, prompt: str, context: str = "",
+                                 use_context: bool = True) -> Iterator[str]:
+        """
+        Gera resposta usando o modelo LLM, devolvendo os trechos à medida que chegam
+        
+        Args:
+            prompt: Pergunta do usuário
+            context: Contexto adicional dos documentos
+            use_context: Se deve usar contexto dos documentos
+        
+        Returns:
+            Iterador com os trechos da resposta
+        """
         try:
-            # Busca contexto relevante se solicitado
-            relevant_context = ""
-            if use_context:
-                search_results = self.document_processor.search_knowledge(prompt)
-                if search_results:
-                    relevant_context = "\n\n".join([
-                        f"[{result['filename']}]: {result['content']}"
-                        for result in search_results[:3]  # Top 3 resultados
-                    ])
+            full_prompt, relevant_context = self._build_prompt(prompt, context, use_context)
+            context_used = bool(relevant_context)
             
-            # Constrói o prompt completo
-            system_prompt = """Você é um assistente inteligente que responde perguntas baseado em documentos fornecidos pelo usuário. 
-
-Instruções:
-- Responda sempre em português brasileiro
-- Use apenas as informações dos documentos fornecidos quando disponíveis
-- Se não houver informação suficiente nos documentos, diga que não encontrou a informação
-- Seja preciso e objetivo
-- Cite a fonte quando possível (nome do arquivo)
-"""
-            
-            full_prompt = system_prompt
-            
-            if relevant_context:
-                full_prompt += f"\n\nContexto dos documentos:\n{relevant_context}"
-            
-            if context:
-                full_prompt += f"\n\nContexto adicional:\n{context}"
+            # Resposta em cache é entregue de uma vez
+            cached = self._cache_enabled()
+            if cached:
+                scope = f"{relevant_context}\0{context}"
+                answer, key, vector = self._cache_lookup(full_prompt, prompt, scope)
+                if answer is not None:
+                    self._add_to_history(prompt, answer, context_used)
+                    yield answer
+                    return
             
-            full_prompt += f"\n\nPergunta do usuário: {prompt}\n\nResposta:"
+            # Com stream, o Ollama envia uma linha JSON por trecho gerado
+            with self._http.post(
+                f"{self.base_url}/api/generate",
+                data=_dumps(self._generate_payload(full_prompt, stream=True)),
+                headers=_JSON_HEADERS,
+                timeout=120,
+                stream=True
+            ) as response:
+                if response.status_code != 200:
+                    logger.error(f"Erro na requisição: {response.status_code}")
+                    yield "Desculpe, ocorreu um erro ao gerar a resposta."
+                    return
+                
+                parts = []
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = _loads(line)
+                    piece = chunk.get('response', '')
+                    if piece:
+                        parts.append(piece)
+                        yield piece
+                    if chunk.get('done'):
+                        break
             
-            # Faz requisição para Ollama
-            payload = {
-                "model": self.model_name,
-                "prompt": full_prompt,
-                "stream": False,
-                "options": {
-                    "temperature": 0.7,
-                    "top_p": 0.9,
-                    "max_tokens": 2000
-                }
-            }
+            answer = "".join(parts).strip()
+            if cached:
+                self._cache_store(key, vector, scope, answer)
             
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json=payload,
-                timeout=120
-            )
+            # Adiciona à história da conversa
+            self._add_to_history(prompt, answer, context_used)
             
-            if response.status_code == 200:
-                result = response.json()
-                answer = result.get('response', '').strip()
-                
-                # Adiciona à história da conversa
-                self.conversation_history.append({
-                    'user': prompt,
-                    'assistant': answer,
-                    'context_used': bool(relevant_context)
-                })
-                
-                return answer
-            else:
-                logger.error(f"Erro na requisição: {response.status_code}")
-                return "Desculpe, ocorreu um erro ao gerar a resposta."
-                
         except Exception as e:
             logger.error(f"Erro ao gerar resposta: {e}")
-            return "Desculpe, ocorreu um erro ao processar sua pergunta."
+            yield "Desculpe, ocorreu um erro ao processar sua pergunta."
     
     def add_document(self, file_path: str, progress_callback=None) -> bool:
         """
@@ -242,7 +736,10 @@ Instruções:
         Returns:
             True se adicionado com sucesso
         """
-        return self.document_processor.process_document(file_path, progress_callback)
+        try:
+            return self.document_processor.process_document(file_path, progress_callback)
+        finally:
+            self.clear_retrieval_cache()
     
     def get_knowledge_stats(self) -> Dict[str, Any]:
         """Retorna estatísticas da base de conhecimento"""
@@ -251,15 +748,41 @@ Instruções:
     def clear_knowledge(self):
         """Limpa toda a base de conhecimento"""
         self.document_processor.clear_knowledge_base()
-        self.conversation_history = []
+        self.clear_conversation()
+        self.clear_retrieval_cache()
+        self.clear_response_cache()
     
-    def get_conversation_history(self) -> List[Dict[str, Any]]:
-        """Retorna histórico da conversa"""
-        return self.conversation_history.copy()
+    def _add_to_history(self, prompt: str, answer: str, context_used: bool):
+        """Registra uma troca no histórico da conversa"""
+        with self._history_lock:
+            self.conversation_history.append({
+                'user': prompt,
+                'assistant': answer,
+                'context_used': context_used
+            })
+            self._history_snapshot = None
+    
+    def get_conversation_history(self) -> Tuple[Dict[str, Any], ...]:
+        """
+        Retorna histórico da conversa
+        
+        Returns:
+            Tupla imutável com as trocas, reaproveitada enquanto o histórico
+            não muda (use list() para obter uma cópia modificável)
+        """
+        snapshot = self._history_snapshot
+        if snapshot is None:
+            with self._history_lock:
+                if self._history_snapshot is None:
+                    self._history_snapshot = tuple(self.conversation_history)
+                snapshot = self._history_snapshot
+        return snapshot
     
     def clear_conversation(self):
         """Limpa histórico da conversa"""
-        self.conversation_history = []
+        with self._history_lock:
+            self.conversation_history.clear()
+            self._history_snapshot = ()
 
 
 class LLMTrainer:
@@ -281,6 +804,10 @@ class LLMTrainer:
             "Absorvendo sabedoria...",
             "Conectando ideias...",
         ]
+        # Percorre as mensagens em ordem embaralhada, sem sorteio a cada chamada
+        self._msg_cycle = itertools.cycle(
+            random.sample(self.training_messages, len(self.training_messages))
+        )
     
     def train_with_document(self, file_path: str, progress_callback=None) -> bool:
         """
@@ -293,13 +820,11 @@ class LLMTrainer:
         Returns:
             True se processado com sucesso
         """
-        import random
-        
         def enhanced_callback(message):
             if progress_callback:
                 # Adiciona mensagens motivacionais aleatórias
                 if random.random() < 0.3:  # 30% chance
-                    motivational = random.choice(self.training_messages)
+                    motivational = next(self._msg_cycle)
                     progress_callback(f"{message} - {motivational}")
                 else:
                     progress_callback(message)
@@ -6,10 +6,28 @@ Integra todos os componentes do sistema para criar uma aplicação completa
 
 import sys
 import os
+import json
+import hashlib
 import subprocess
+import functools
 import importlib.util
+import urllib.request
 from pathlib import Path
 
+# Dependências Python: (pacote no pip, nome usado no import)
+DEPENDENCIES = [
+    ("PyPDF2", "PyPDF2"),
+    ("python-docx", "docx"),
+    ("chromadb", "chromadb"),
+    ("requests", "requests"),
+]
+
+# Marcador gravado após uma configuração bem-sucedida
+SETUP_SENTINEL = Path.home() / ".cache" / "my-llm" / "setup.ok"
+
+# Servidor Ollama local
+OLLAMA_URL = "http://localhost:11434"
+
 def check_python_version():
     """Verifica se a versão do Python é compatível"""
     if sys.version_info < (3, 7):
@@ -19,8 +37,8 @@ def check_python_version():
     print(f"✅ Python {sys.version_info.major}.{sys.version_info.minor} detectado")
     return True
 
-def install_package(package_name, import_name=None):
-    """Instala um pacote Python se não estiver disponível"""
+def is_package_installed(package_name, import_name=None):
+    """Verifica se um pacote Python já pode ser importado"""
     if import_name is None:
         import_name = package_name
     
@@ -29,49 +47,108 @@ def install_package(package_name, import_name=None):
         print(f"✅ {package_name} já está instalado")
         return True
     except ImportError:
-        print(f"📦 Instalando {package_name}...")
-        try:
-            subprocess.check_call([
-                sys.executable, "-m", "pip", "install", package_name, "--user"
-            ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            print(f"✅ {package_name} instalado com sucesso")
-            return True
-        except subprocess.CalledProcessError:
-            print(f"❌ Erro ao instalar {package_name}")
-            return False
+        return False
+
+def pip_install(packages):
+    """Instala pacotes com uma única chamada ao pip"""
+    try:
+        subprocess.check_call([
+            sys.executable, "-m", "pip", "install", *packages, "--user"
+        ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return True
+    except subprocess.CalledProcessError:
+        return False
 
 def install_dependencies():
     """Instala todas as dependências necessárias"""
     print("🔧 Verificando e instalando dependências...")
     
-    dependencies = [
-        ("PyPDF2", "PyPDF2"),
-        ("python-docx", "docx"),
-        ("chromadb", "chromadb"),
-        ("requests", "requests"),
-    ]
+    missing = [package for package, import_name in DEPENDENCIES
+               if not is_package_installed(package, import_name)]
+    if not missing:
+        return True
+    
+    # Os pacotes faltantes vão juntos para o pip: ele resolve as dependências
+    # em comum uma só vez (pips simultâneos disputariam o mesmo site-packages)
+    print(f"📦 Instalando {', '.join(missing)}...")
+    if pip_install(missing):
+        print("✅ Dependências instaladas com sucesso")
+        return True
     
+    # Se a instalação conjunta falhou, tenta um a um para indicar quais falharam
     all_installed = True
-    for package, import_name in dependencies:
-        if not install_package(package, import_name):
+    for package in missing:
+        if pip_install([package]):
+            print(f"✅ {package} instalado com sucesso")
+        else:
+            print(f"❌ Erro ao instalar {package}")
             all_installed = False
     
     return all_installed
 
 def check_ollama():
     """Verifica se Ollama está disponível"""
+    if get_ollama_version() is not None:
+        print("✅ Ollama está instalado")
+        return True
+    
+    print("⚠️ Ollama não está instalado ou não está funcionando corretamente")
+    return False
+
+@functools.lru_cache(maxsize=1)
+def get_ollama_version():
+    """Retorna a versão do Ollama, ou None se indisponível (guardada após a primeira consulta)"""
+    # Com o servidor no ar, /api/version responde sem abrir um processo
     try:
-        result = subprocess.run(['ollama', '--version'], 
+        with urllib.request.urlopen(f"{OLLAMA_URL}/api/version", timeout=0.5) as response:
+            return json.loads(response.read())["version"]
+    except (OSError, ValueError, KeyError):
+        pass
+    
+    try:
+        result = subprocess.run(['ollama', '--version'],
                               capture_output=True, text=True, timeout=10)
-        if result.returncode == 0:
-            print("✅ Ollama está instalado")
-            return True
-        else:
-            print("❌ Ollama não está funcionando corretamente")
-            return False
     except (subprocess.TimeoutExpired, FileNotFoundError):
-        print("⚠️ Ollama não está instalado")
+        return None
+    
+    # "ollama version is X" ou, sem servidor, "Warning: client version is X"
+    output = result.stdout.split()
+    return output[-1] if result.returncode == 0 and output else None
+
+def setup_state(ollama_version):
+    """Estado do ambiente que torna uma configuração anterior válida"""
+    return {
+        "python_version": list(sys.version_info[:2]),
+        "deps_hash": hashlib.sha256(repr(DEPENDENCIES).encode()).hexdigest(),
+        "ollama_version": ollama_version,
+    }
+
+def setup_is_cached():
+    """Verifica se o marcador de configuração ainda corresponde ao ambiente atual"""
+    try:
+        saved = json.loads(SETUP_SENTINEL.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return False
+    
+    # Compara primeiro o que não exige processos externos
+    expected = setup_state(saved.get("ollama_version"))
+    if saved != expected:
+        return False
+    
+    # Pacotes removidos depois da configuração (sem importá-los)
+    if any(importlib.util.find_spec(name) is None for _, name in DEPENDENCIES):
         return False
+    
+    version = saved["ollama_version"]
+    return version is not None and get_ollama_version() == version
+
+def save_setup_state():
+    """Grava o marcador de configuração concluída"""
+    try:
+        SETUP_SENTINEL.parent.mkdir(parents=True, exist_ok=True)
+        SETUP_SENTINEL.write_text(json.dumps(setup_state(get_ollama_version())), encoding="utf-8")
+    except OSError as e:
+        print(f"⚠️ Não foi possível gravar {SETUP_SENTINEL}: {e}")
 
 def install_ollama():
     """Instala Ollama automaticamente (Linux/Mac)"""
@@ -85,6 +162,7 @@ def install_ollama():
             
             if result.returncode == 0:
                 subprocess.run(['sh'], input=result.stdout, text=True, timeout=300)
+                get_ollama_version.cache_clear()
                 print("✅ Ollama instalado com sucesso")
                 return True
             else:
@@ -104,6 +182,11 @@ def setup_system():
     print("🚀 Configurando Sistema LLM Local...")
     print("=" * 50)
     
+    # Nada mudou desde a última configuração bem-sucedida
+    if setup_is_cached():
+        print("✅ Configuração anterior ainda válida")
+        return True
+    
     # Verifica Python
     if not check_python_version():
         return False
@@ -127,6 +210,7 @@ def setup_system():
             print("Por favor, instale Ollama manualmente: https://ollama.com/download")
             return False
     
+    save_setup_state()
     print("\n✅ Sistema configurado com sucesso!")
     return True
 
@@ -0,0 +1,35 @@
+"""Configuração comum dos testes"""
+
+import os
+import sys
+
+import pytest
+
+# Os módulos do projeto ficam na raiz do repositório
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import document_processor
+from document_processor import DocumentProcessor
+
+
+@pytest.fixture
+def processor(tmp_path, monkeypatch):
+    """Processador com banco em diretório temporário, sem ChromaDB (apenas SQLite)"""
+    monkeypatch.setattr(document_processor, "chromadb", None)
+    proc = DocumentProcessor(str(tmp_path / "kb"))
+    yield proc
+    proc.close()
+
+
+def make_text(seed: int, sentences: int = 40) -> str:
+    """Gera um texto determinístico com frases de palavras variadas"""
+    import random
+    
+    rng = random.Random(seed)
+    syllables = ["ca", "de", "mi", "no", "pa", "ra", "se", "to", "lu", "ver", "bor", "tan"]
+    vocabulary = ["".join(rng.choice(syllables) for _ in range(rng.randint(1, 4)))
+                  for _ in range(800)]
+    return " ".join(
+        " ".join(rng.choice(vocabulary) for _ in range(rng.randint(8, 16))).capitalize() + "."
+        for _ in range(sentences)
+    )
@@ -0,0 +1,339 @@
+"""Testes do DocumentProcessor: deduplicação de chunks, FTS5 e migrações do SQLite"""
+
+import gc
+import hashlib
+import sqlite3
+
+import pytest
+
+import document_processor
+from document_processor import DocumentProcessor
+
+from conftest import make_text
+
+
+def _write(tmp_path, name: str, text: str) -> str:
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def _chunk_rows(processor, filename: str):
+    return processor.conn.execute('''
+        SELECT c.id, c.content, s.embedded
+        FROM chunks c
+        JOIN documents d ON c.document_id = d.id
+        JOIN chunk_signatures s ON s.chunk_id = c.id
+        WHERE d.filename = ?
+        ORDER BY c.chunk_index
+    ''', (filename,)).fetchall()
+
+
+def test_identical_chunks_are_stored_once(processor, tmp_path):
+    text = make_text(1)
+    assert processor.process_document(_write(tmp_path, "v1.txt", text))
+    extra = make_text(2, sentences=10)
+    assert processor.process_document(_write(tmp_path, "v2.txt", text + " " + extra))
+    
+    stored = {content for _, content, _ in _chunk_rows(processor, "v1.txt")}
+    new = [content for _, content, _ in _chunk_rows(processor, "v2.txt")]
+    assert new
+    assert not stored.intersection(new)
+
+
+def test_kept_chunks_keep_their_position(processor, tmp_path):
+    text = make_text(1)
+    assert processor.process_document(_write(tmp_path, "v1.txt", text))
+    revised = text + " " + make_text(2, sentences=10)
+    assert processor.process_document(_write(tmp_path, "v2.txt", revised))
+    
+    # Os chunks repetidos do início foram descartados; os demais mantêm a posição
+    chunks = processor.chunk_text(revised)
+    rows = processor.conn.execute('''
+        SELECT c.chunk_index, c.content
+        FROM chunks c JOIN documents d ON c.document_id = d.id
+        WHERE d.filename = 'v2.txt'
+    ''').fetchall()
+    assert rows and len(rows) < len(chunks)
+    assert all(chunks[index] == content for index, content in rows)
+
+
+def test_edited_chunks_survive(processor, tmp_path):
+    sentences = make_text(3).split(". ")
+    
+    # Revisão que só troca números em algumas frases
+    revised = list(sentences)
+    for i in range(0, len(revised), 8):
+        revised[i] = f"{revised[i]} valor {1000 + i} em 2024"
+        sentences[i] = f"{sentences[i]} valor {500 + i} em 2023"
+    assert processor.process_document(_write(tmp_path, "v1.txt", ". ".join(sentences)))
+    assert processor.process_document(_write(tmp_path, "v2.txt", ". ".join(revised)))
+    
+    for i in range(0, len(revised), 8):
+        results = processor.search_knowledge(f"valor {1000 + i}")
+        assert any(result["filename"] == "v2.txt" for result in results), i
+
+
+def test_small_edit_is_kept_in_sqlite(processor, tmp_path):
+    text = make_text(4)
+    assert processor.process_document(_write(tmp_path, "v1.txt", text))
+    
+    # Uma única palavra trocada em todo o texto
+    edited = text.replace(".", " 987654.", 1)
+    assert processor.process_document(_write(tmp_path, "v2.txt", edited))
+    
+    assert any("987654" in content for _, content, _ in _chunk_rows(processor, "v2.txt"))
+    assert processor.search_knowledge("987654")[0]["filename"] == "v2.txt"
+
+
+def test_near_duplicates_are_not_embedded(processor, tmp_path):
+    text = make_text(5)
+    assert processor.process_document(_write(tmp_path, "v1.txt", text))
+    
+    # Mesmas palavras em maiúsculas: texto diferente, assinatura igual
+    assert processor.process_document(_write(tmp_path, "v2.txt", text.upper()))
+    
+    rows = _chunk_rows(processor, "v2.txt")
+    assert rows
+    assert all(embedded == 0 for _, _, embedded in rows)
+    assert all(embedded == 1 for _, _, embedded in _chunk_rows(processor, "v1.txt"))
+    
+    # A reindexação envia ao ChromaDB apenas os chunks com embedding próprio
+    processor.reindex_vector_db()
+    pending = {row[0] for row in processor.conn.execute("SELECT chunk_id FROM pending_chunks")}
+    assert pending == {chunk_id for chunk_id, _, _ in _chunk_rows(processor, "v1.txt")}
+
+
+def test_old_signature_table_is_rebuilt(tmp_path, monkeypatch):
+    monkeypatch.setattr(document_processor, "chromadb", None)
+    db_path = tmp_path / "kb"
+    db_path.mkdir()
+    
+    # Banco com a tabela de assinaturas no formato antigo (sem hash do texto)
+    conn = sqlite3.connect(db_path / "documents.db")
+    conn.executescript('''
+        CREATE TABLE documents (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            filename TEXT NOT NULL,
+            file_hash TEXT UNIQUE NOT NULL,
+            file_type TEXT NOT NULL,
+            processed_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            chunk_count INTEGER DEFAULT 0,
+            hash_algo TEXT NOT NULL DEFAULT 'md5'
+        );
+        CREATE TABLE chunks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            document_id INTEGER,
+            chunk_index INTEGER,
+            content TEXT NOT NULL
+        );
+        CREATE TABLE chunk_signatures (
+            sig INTEGER PRIMARY KEY, chunk_id INTEGER,
+            band0 INTEGER, band1 INTEGER, band2 INTEGER, band3 INTEGER
+        );
+        INSERT INTO documents (filename, file_hash, file_type, chunk_count)
+        VALUES ('antigo.txt', 'abc', '.txt', 1);
+        INSERT INTO chunks (document_id, chunk_index, content) VALUES (1, 0, 'Trecho antigo guardado.');
+    ''')
+    conn.close()
+    
+    processor = DocumentProcessor(str(db_path))
+    try:
+        columns = {row[1] for row in processor.conn.execute("PRAGMA table_info(chunk_signatures)")}
+        assert "content_hash" in columns
+        assert processor.conn.execute("SELECT chunk_id, embedded FROM chunk_signatures").fetchall() == [(1, 1)]
+        
+        # O chunk existente conta para a deduplicação
+        assert processor.process_document(_write(tmp_path, "novo.txt", "Trecho antigo guardado."))
+        assert processor.get_document_stats()["total_chunks"] == 1
+    finally:
+        processor.close()
+
+
+def _baseline_database(db_path, file_hash: str):
+    """Banco no esquema original: documents sem hash_algo e hashes em MD5"""
+    db_path.mkdir()
+    conn = sqlite3.connect(db_path / "documents.db")
+    conn.executescript('''
+        CREATE TABLE documents (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            filename TEXT NOT NULL,
+            file_hash TEXT UNIQUE NOT NULL,
+            file_type TEXT NOT NULL,
+            processed_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            chunk_count INTEGER DEFAULT 0
+        );
+        CREATE TABLE chunks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            document_id INTEGER,
+            chunk_index INTEGER,
+            content TEXT NOT NULL,
+            FOREIGN KEY (document_id) REFERENCES documents (id)
+        );
+    ''')
+    conn.execute(
+        "INSERT INTO documents (filename, file_hash, file_type, chunk_count) VALUES (?, ?, '.txt', 1)",
+        ("antigo.txt", file_hash)
+    )
+    conn.execute("INSERT INTO chunks (document_id, chunk_index, content) VALUES (1, 0, 'Trecho antigo.')")
+    conn.commit()
+    conn.close()
+
+
+def test_hash_algo_migration_on_baseline_schema(tmp_path, monkeypatch):
+    monkeypatch.setattr(document_processor, "chromadb", None)
+    path = _write(tmp_path, "antigo.txt", make_text(7))
+    db_path = tmp_path / "kb"
+    _baseline_database(db_path, hashlib.md5(open(path, "rb").read()).hexdigest())
+    
+    processor = DocumentProcessor(str(db_path))
+    try:
+        rows = processor.conn.execute("SELECT file_hash, hash_algo FROM documents").fetchall()
+        assert [algo for _, algo in rows] == ["md5"]
+        
+        # O mesmo arquivo é reconhecido pelo MD5 e passa para o algoritmo atual
+        assert processor.process_document(path)
+        assert processor.get_document_stats()["total_documents"] == 1
+        assert processor.conn.execute("SELECT file_hash, hash_algo FROM documents").fetchall() == [
+            (processor.calculate_file_hash(path), processor.hash_algo)
+        ]
+    finally:
+        processor.close()
+
+
+def test_new_files_skip_legacy_rehash(processor, tmp_path, monkeypatch):
+    calls = []
+    original = processor.calculate_file_hashes
+    
+    def counting(file_path, algos):
+        calls.append(list(algos))
+        return original(file_path, algos)
+    
+    monkeypatch.setattr(processor, "calculate_file_hashes", counting)
+    for i in range(3):
+        assert processor.process_document(_write(tmp_path, f"doc{i}.txt", make_text(10 + i)))
+    
+    # Só o hash no algoritmo atual: não há documentos antigos no banco
+    assert calls == [[processor.hash_algo]] * 3
+
+
+def _reference_hash(algo: str, data: bytes) -> str:
+    if algo == "xxh3_128":
+        return document_processor.xxhash.xxh3_128(data).hexdigest()
+    if algo == "blake3":
+        return document_processor.blake3(data).hexdigest()
+    return hashlib.new(algo, data).hexdigest()
+
+
+@pytest.mark.parametrize("size", [0, 1000, document_processor.HASH_MMAP_THRESHOLD + 12345])
+def test_file_hash_matches_reference(processor, tmp_path, size):
+    data = bytes(range(256)) * (size // 256) + bytes(size % 256)
+    path = tmp_path / "dados.bin"
+    path.write_bytes(data)
+    
+    assert processor.calculate_file_hash(str(path)) == _reference_hash(processor.hash_algo, data)
+    assert processor.calculate_file_hash(str(path), "md5") == hashlib.md5(data).hexdigest()
+
+
+def test_file_hash_without_mmap(processor, tmp_path, monkeypatch):
+    data = bytes(range(256)) * (3 * document_processor.HASH_MMAP_THRESHOLD // 256 + 7)
+    path = tmp_path / "dados.bin"
+    path.write_bytes(data)
+    
+    def no_mmap(*args, **kwargs):
+        raise OSError("mmap indisponível")
+    
+    # Sistemas de arquivos sem mmap usam a leitura em blocos
+    monkeypatch.setattr(document_processor.mmap, "mmap", no_mmap)
+    hashes = processor.calculate_file_hashes(str(path), [processor.hash_algo, "md5"])
+    assert hashes == {
+        processor.hash_algo: _reference_hash(processor.hash_algo, data),
+        "md5": hashlib.md5(data).hexdigest(),
+    }
+
+
+def _fts_ids(processor, word: str):
+    return [row[0] for row in processor.conn.execute(
+        "SELECT rowid FROM chunks_fts WHERE chunks_fts MATCH ? ORDER BY rowid", (f'"{word}"',)
+    )]
+
+
+def test_fts_triggers_follow_chunk_changes(processor, tmp_path):
+    if not processor.fts_enabled:
+        pytest.skip("SQLite sem FTS5")
+    assert processor.process_document(_write(tmp_path, "doc.txt", "Um trecho curto com zorblax."))
+    (chunk_id,) = _fts_ids(processor, "zorblax")
+    
+    processor.conn.execute("UPDATE chunks SET content = 'Agora com quuxite.' WHERE id = ?", (chunk_id,))
+    assert _fts_ids(processor, "zorblax") == []
+    assert _fts_ids(processor, "quuxite") == [chunk_id]
+    
+    processor.conn.execute("DELETE FROM chunks WHERE id = ?", (chunk_id,))
+    assert _fts_ids(processor, "quuxite") == []
+    
+    # Nenhuma linha do índice sobra sem o chunk correspondente
+    orphans = processor.conn.execute(
+        "SELECT COUNT(*) FROM chunks_fts WHERE rowid NOT IN (SELECT id FROM chunks)"
+    ).fetchone()[0]
+    assert orphans == 0
+
+
+def test_clear_knowledge_base_empties_fts(processor, tmp_path):
+    if not processor.fts_enabled:
+        pytest.skip("SQLite sem FTS5")
+    assert processor.process_document(_write(tmp_path, "doc.txt", make_text(9) + " Palavra zorblax."))
+    assert _fts_ids(processor, "zorblax")
+    
+    processor.clear_knowledge_base()
+    assert processor.conn.execute("SELECT COUNT(*) FROM chunks_fts").fetchone()[0] == 0
+    assert processor.search_knowledge("zorblax") == []
+
+
+def test_fts_is_built_for_existing_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(document_processor, "chromadb", None)
+    db_path = tmp_path / "kb"
+    _baseline_database(db_path, "abc")
+    
+    processor = DocumentProcessor(str(db_path))
+    try:
+        if not processor.fts_enabled:
+            pytest.skip("SQLite sem FTS5")
+        assert _fts_ids(processor, "antigo") == [1]
+    finally:
+        processor.close()
+
+
+class _FakeCollection:
+    """Coleção do ChromaDB em memória, só com o que flush_chroma usa"""
+    
+    def __init__(self):
+        self.ids = []
+    
+    def add(self, documents, metadatas, ids, embeddings=None):
+        self.ids.extend(ids)
+
+
+def test_close_indexes_pending_chunks(processor, tmp_path):
+    collection = _FakeCollection()
+    processor.chroma_client, processor.collection = object(), collection
+    
+    assert processor.process_document(_write(tmp_path, "doc.txt", make_text(6)))
+    chunk_count = processor.get_document_stats()["total_chunks"]
+    assert processor.pending_count() == chunk_count
+    
+    processor.close()
+    assert len(collection.ids) == chunk_count
+
+
+def test_indexer_thread_does_not_keep_processor_alive(tmp_path):
+    pytest.importorskip("chromadb")
+    processor = DocumentProcessor(str(tmp_path / "kb"))
+    indexer = processor._indexer
+    if indexer is None:
+        processor.close()
+        pytest.skip("ChromaDB não pôde ser configurado")
+    
+    del processor
+    gc.collect()
+    indexer.join(timeout=5)
+    assert not indexer.is_alive()
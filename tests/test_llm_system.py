@@ -0,0 +1,163 @@
+"""Testes do cache de respostas do LocalLLM com um servidor Ollama simulado"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pytest
+
+import document_processor
+import llm_system
+from llm_system import LocalLLM
+
+
+class _FakeOllama(BaseHTTPRequestHandler):
+    """Responde /api/generate em trechos, numerando as respostas geradas"""
+    
+    calls = 0
+    
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        type(self).calls += 1
+        lines = [
+            {"response": "resposta ", "done": False},
+            {"response": str(type(self).calls), "done": True},
+        ]
+        body = b"".join(json.dumps(line).encode() + b"\n" for line in lines)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def do_GET(self):
+        # Resposta de um proxy no lugar do Ollama
+        body = b"<html>Proxy</html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def ollama():
+    """Servidor Ollama simulado em uma porta livre"""
+    handler = type("Handler", (_FakeOllama,), {"calls": 0})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield handler, f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def llm(ollama, tmp_path, monkeypatch):
+    """LocalLLM com base de conhecimento temporária e respostas determinísticas (com cache)"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(document_processor, "chromadb", None)
+    model = LocalLLM(base_url=ollama[1])
+    model.set_deterministic(True)
+    yield model
+    model.close()
+
+
+@pytest.fixture
+def same_meaning(llm):
+    """Embeddings iguais para toda pergunta: qualquer par é equivalente"""
+    processor = llm.document_processor
+    processor.embedder = object()
+    processor.embed = lambda texts: [np.full(4, 0.5, dtype=np.float32) for _ in texts]
+    return llm
+
+
+def test_repeated_prompt_uses_cache(llm, ollama):
+    first = llm.generate_response("Qual o prazo de entrega?")
+    assert llm.generate_response("Qual o prazo de entrega?") == first
+    assert ollama[0].calls == 1
+
+
+def test_high_temperature_skips_cache(llm, ollama):
+    llm.set_deterministic(False)
+    assert llm.temperature == 0.7
+    llm.generate_response("Qual o prazo de entrega?")
+    llm.generate_response("Qual o prazo de entrega?")
+    assert ollama[0].calls == 2
+
+
+def test_low_temperature_from_constructor_uses_cache(ollama, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(document_processor, "chromadb", None)
+    model = LocalLLM(base_url=ollama[1], temperature=0.2)
+    try:
+        first = model.generate_response("Qual o prazo de entrega?")
+        assert model.generate_response("Qual o prazo de entrega?") == first
+        assert ollama[0].calls == 1
+    finally:
+        model.close()
+
+
+def test_equivalent_question_needs_same_context(same_meaning, ollama):
+    llm = same_meaning
+    first = llm.generate_response("Qual o prazo de entrega?")
+    assert llm.generate_response("Qual é o prazo da entrega?") == first
+    assert ollama[0].calls == 1
+    
+    # Com outro contexto a pergunta equivalente é respondida pelo modelo
+    assert llm.generate_response("Qual é o prazo da entrega?", context="Contrato B") != first
+    assert ollama[0].calls == 2
+
+
+def test_new_document_changes_scope(same_meaning, ollama, tmp_path):
+    llm = same_meaning
+    first = llm.generate_response("zorblax")
+    
+    path = tmp_path / "doc.txt"
+    path.write_text("O prazo do zorblax é de dez dias.", encoding="utf-8")
+    assert llm.add_document(str(path))
+    
+    # Os trechos encontrados agora fazem parte do prompt: não serve a resposta anterior
+    assert llm.generate_response("zorblax") != first
+    assert ollama[0].calls == 2
+
+
+def test_clear_knowledge_invalidates_cache(same_meaning, ollama):
+    llm = same_meaning
+    first = llm.generate_response("Qual o prazo de entrega?")
+    llm.clear_knowledge()
+    assert llm.generate_response("Qual o prazo de entrega?") != first
+    assert ollama[0].calls == 2
+
+
+def test_context_found_while_indexing_is_not_cached(llm, monkeypatch):
+    processor = llm.document_processor
+    queue = [1]
+    search = processor.search_knowledge_many
+    
+    def search_while_indexing(queries):
+        # A fila de indexação esvazia durante a busca
+        results = search(queries)
+        queue.clear()
+        return results
+    
+    monkeypatch.setattr(processor, "pending_count", lambda: len(queue))
+    monkeypatch.setattr(processor, "search_knowledge_many", search_while_indexing)
+    llm._retrieve_context("Qual o prazo de entrega?")
+    assert not llm._retrieval_cache
+    
+    llm._retrieve_context("Qual o prazo de entrega?")
+    assert len(llm._retrieval_cache) == 1
+
+
+def test_version_ignores_non_json_response(llm, monkeypatch):
+    def no_cli(*args, **kwargs):
+        raise FileNotFoundError("ollama")
+    
+    monkeypatch.setattr(llm_system.subprocess, "run", no_cli)
+    assert llm.ollama_version() is None
+    assert not llm.check_ollama_installation()
@@ -0,0 +1,254 @@
+"""
+Extração de Texto dos Documentos
+Leitura de arquivos PDF, DOCX e TXT e divisão do texto em chunks
+
+Fica separado de document_processor para que os processos de extração em
+paralelo importem apenas as bibliotecas de leitura de arquivos, sem ChromaDB,
+modelo de embeddings e demais dependências da busca.
+"""
+
+import zipfile
+import logging
+import threading
+from typing import List
+from pathlib import Path
+
+try:
+    import PyPDF2
+except ImportError:
+    PyPDF2 = None
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+try:
+    from docx import Document
+except ImportError:
+    Document = None
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+# Buffer de leitura usado ao abrir PDFs
+PDF_READ_BUFFER = 1 << 20
+
+# O PDFium não é thread-safe: uma única thread por processo pode usá-lo de cada vez
+_PDFIUM_LOCK = threading.Lock()
+
+# Namespace WordprocessingML dos elementos de word/document.xml
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+logger = logging.getLogger(__name__)
+
+
+def extract_text_from_pdf(file_path: str) -> str:
+    """Extrai texto de arquivo PDF (usa pypdfium2 se instalado, senão PyPDF2)"""
+    if pdfium is None and PyPDF2 is None:
+        raise ImportError("PyPDF2 não está instalado. Execute: pip install PyPDF2")
+    
+    parts = []
+    try:
+        if pdfium is not None:
+            with _PDFIUM_LOCK:
+                pdf = pdfium.PdfDocument(file_path)
+                try:
+                    for page in pdf:
+                        text_page = page.get_textpage()
+                        parts.append(text_page.get_text_range())
+                        text_page.close()
+                        page.close()
+                finally:
+                    pdf.close()
+        else:
+            with open(file_path, 'rb', buffering=PDF_READ_BUFFER) as file:
+                pdf_reader = PyPDF2.PdfReader(file)
+                for page in pdf_reader.pages:
+                    parts.append(page.extract_text() or "")
+    except Exception as e:
+        logger.error(f"Erro ao extrair texto do PDF {file_path}: {e}")
+        raise
+    
+    return "\n".join(parts).strip()
+
+
+def extract_text_from_docx(file_path: str) -> str:
+    """Extrai texto de arquivo DOCX"""
+    # Lê o XML diretamente quando possível, sem o modelo de objetos do python-docx
+    if etree is not None:
+        try:
+            return _read_docx_text(file_path)
+        except Exception as e:
+            logger.warning(f"Leitura direta do DOCX falhou, usando python-docx: {e}")
+    
+    if Document is None:
+        raise ImportError("python-docx não está instalado. Execute: pip install python-docx")
+    
+    try:
+        doc = Document(file_path)
+        text = "\n".join(paragraph.text for paragraph in doc.paragraphs)
+    except Exception as e:
+        logger.error(f"Erro ao extrair texto do DOCX {file_path}: {e}")
+        raise
+    
+    return text.strip()
+
+
+def extract_text_from_txt(file_path: str) -> str:
+    """Extrai texto de arquivo TXT"""
+    try:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            return file.read().strip()
+    except UnicodeDecodeError:
+        # Tenta com encoding latin-1 se UTF-8 falhar
+        with open(file_path, 'r', encoding='latin-1') as file:
+            return file.read().strip()
+
+
+def extract_text(file_path: str) -> str:
+    """Extrai texto do arquivo de acordo com sua extensão"""
+    file_ext = Path(file_path).suffix.lower()
+    if file_ext == '.pdf':
+        return extract_text_from_pdf(file_path)
+    elif file_ext == '.docx':
+        return extract_text_from_docx(file_path)
+    elif file_ext == '.txt':
+        return extract_text_from_txt(file_path)
+    raise ValueError(f"Formato de arquivo não suportado: {file_ext}")
+
+
+def chunk_text(text: str, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
+    """
+    Divide o texto em chunks menores para processamento
+    
+    Args:
+        text: Texto a ser dividido
+        chunk_size: Tamanho máximo de cada chunk
+        overlap: Sobreposição entre chunks
+    
+    Returns:
+        Lista de chunks de texto
+    """
+    text_len = len(text)
+    if text_len <= chunk_size:
+        return [text]
+    
+    chunks = []
+    start = 0
+    
+    while start < text_len:
+        end = start + chunk_size
+        
+        # Tenta quebrar em uma frase completa
+        if end < text_len:
+            # Procura pelo último ponto, exclamação ou interrogação
+            # (rfind com limites percorre o texto sem criar substrings e
+            # cada janela é varrida uma única vez, então o custo total é O(n);
+            # str ASCII já ocupa 1 byte por caractere, e converter para bytes
+            # só acrescentaria o encode/decode dos chunks)
+            last_sentence = max(
+                text.rfind('.', start, end),
+                text.rfind('!', start, end),
+                text.rfind('?', start, end)
+            )
+            
+            # Quebras dentro da sobreposição fariam o próximo chunk recuar
+            if last_sentence > start + overlap:
+                end = last_sentence + 1
+        
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        
+        start = end - overlap
+    
+    return chunks
+
+
+def extract_and_chunk(file_path: str, progress_callback=None) -> List[str]:
+    """
+    Extrai o texto de um arquivo e o divide em chunks
+    
+    Executada nos processos de trabalho de DocumentProcessor.process_documents;
+    não acessa o SQLite nem o ChromaDB.
+    
+    Args:
+        file_path: Caminho para o arquivo
+        progress_callback: Função de callback para progresso
+    
+    Returns:
+        Lista de chunks (vazia se nenhum texto foi extraído)
+    """
+    if progress_callback:
+        progress_callback("Extraindo texto do documento...")
+    
+    text = extract_text(file_path)
+    if not text.strip():
+        return []
+    
+    if progress_callback:
+        progress_callback("Dividindo texto em chunks...")
+    
+    return chunk_text(text)
+
+
+def _read_docx_text(file_path: str) -> str:
+    """
+    Extrai o texto dos parágrafos do corpo de um DOCX lendo word/document.xml
+    
+    Produz o mesmo texto que juntar paragraph.text de doc.paragraphs no
+    python-docx, mas percorre o XML em fluxo e descarta cada elemento do
+    corpo depois de lido, mantendo o uso de memória constante.
+    
+    Args:
+        file_path: Caminho para o arquivo
+    
+    Returns:
+        Texto extraído
+    """
+    body_tag, p_tag = _W + "body", _W + "p"
+    paragraphs = []
+    
+    with zipfile.ZipFile(file_path) as archive, archive.open("word/document.xml") as xml:
+        for _, element in etree.iterparse(xml, events=("end",),
+                                          tag=(p_tag, _W + "tbl", _W + "sdt")):
+            parent = element.getparent()
+            if parent is None or parent.tag != body_tag:
+                continue
+            
+            if element.tag == p_tag:
+                paragraphs.append(_docx_paragraph_text(element))
+            
+            # Libera o elemento e os irmãos anteriores já processados
+            element.clear()
+            while element.getprevious() is not None:
+                del parent[0]
+    
+    return "\n".join(paragraphs).strip()
+
+
+def _docx_paragraph_text(paragraph) -> str:
+    """Texto de um elemento w:p, com as mesmas conversões do python-docx"""
+    parts = []
+    for node in paragraph.iterchildren(_W + "r", _W + "hyperlink"):
+        runs = node.iterchildren(_W + "r") if node.tag == _W + "hyperlink" else (node,)
+        for run in runs:
+            for item in run.iterchildren(_W + "t", _W + "tab", _W + "br", _W + "cr",
+                                         _W + "noBreakHyphen", _W + "ptab"):
+                tag = item.tag
+                if tag == _W + "t":
+                    parts.append(item.text or "")
+                elif tag == _W + "br":
+                    # Quebras de página e de coluna não geram texto
+                    if item.get(_W + "type", "textWrapping") == "textWrapping":
+                        parts.append("\n")
+                elif tag == _W + "cr":
+                    parts.append("\n")
+                elif tag == _W + "noBreakHyphen":
+                    parts.append("-")
+                else:
+                    parts.append("\t")
+    return "".join(parts)